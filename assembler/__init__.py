@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*- 
+
+__version__ = '1.1.0'
+
+from .api import assemble, iter_words
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Library API to translate assembly programs in memory, without reading or writing files.
+Source can be text, bytes or an iterable of lines. Results are 16-bit words, passed on to optional sinks.
+"""
+
+from assembler.parser import Parser
+
+
+def source_lines(source):
+    """
+    Returns list of stripped lines for source: a str, UTF-8 bytes, or an iterable of str or bytes lines.
+    """
+    
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = bytes(source).decode()
+    if isinstance(source, str):
+        return [line.strip() for line in source.splitlines()]
+    return [(line.decode() if isinstance(line, (bytes, bytearray)) else line).strip() for line in source]
+    
+
+def parse(source, cache=None):
+    """
+    Returns Parser for source, with first pass run and no output files. 
+    Pass a code.InstructionCache as cache to keep c-instruction lookups warm across calls.
+    """
+    
+    p = Parser('<memory>', content=source_lines(source), verbose=False, cache=cache)
+    p.run_first_pass()
+    return p
+    
+
+def assemble(source, sinks=(), cache=None):
+    """
+    Translates source and returns array('H') of 16-bit words. 
+    Each sink, any callable such as output.Sink, is called with the words.
+    """
+    
+    words = parse(source, cache).encode_program()
+    for sink in sinks:
+        sink(words)
+    return words
+    
+
+def iter_words(source, cache=None):
+    """
+    Yields (rom_address, word) for each command of source. 
+    Source is translated when iteration starts, since labels may be referenced before they are defined.
+    """
+    
+    yield from enumerate(assemble(source, cache=cache))
@@ -5,21 +5,348 @@ Assembler reads a text file - such as filename.asm - containing an assembly prog
 and produces as output a text file - filename.hack - containing the translated machine code. 
 
 The name of the input file is supplied as a command-line argument: prompt> python -m assembler filename.asm
+To read assembly from stdin and write translated words to stdout, in a pipe: prompt> vm_translator | python -m assembler - [--format bin]
 To run all files in data/input/ directory: prompt> python -m assembler run_all
+To run all files in other folders with 8 worker processes: prompt> python -m assembler run_all --input-dir src --output-dir build --jobs 8
+To translate one large file in chunks across 8 worker processes: prompt> python -m assembler filename.asm --jobs 8
+To translate in one pass with label backpatching, add flag: prompt> python -m assembler filename.asm --single-pass
+To scan a memory-mapped file as bytes, without a string per line: prompt> python -m assembler filename.asm --mapped
+To translate with NumPy in bulk, if installed: prompt> python -m assembler filename.asm --numpy
+To remove redundant instructions with peephole optimizer rules: prompt> python -m assembler filename.asm --optimize
+To drop code that cannot be reached from the start, and list removed ranges: prompt> python -m assembler filename.asm --dead-code
+To encode again only label blocks changed since the source map of the previous build: prompt> python -m assembler filename.asm --incremental
+To overlap reading and writing with encoding in threaded stages, and report their throughput and queue stalls: 
+prompt> python -m assembler filename.asm --pipelined [--block-size 1024] [--queue-size 4]
+To only check files for errors, listing all diagnostics with line numbers and writing no output: 
+prompt> python -m assembler filename.asm --check, or run_all --check, or - --check to check stdin
+To save other output formats, list them: prompt> python -m assembler filename.asm --format hack,bin,bin-le,hex
+To keep translating .asm files in a folder as they change: prompt> python -m assembler --watch data/input/
+To save a relocatable object file, data/output/filename.obj: prompt> python -m assembler filename.asm --object
+To link object files into data/output/program.hack: prompt> python -m assembler --link program a.obj b.obj
+To compare a translated file with an expected one, .hack or binary, and show differing words decoded: 
+prompt> python -m assembler --verify data/compare/Pong.hack data/output/Pong.hack [--limit 10]
+To grade (source, expected) pairs listed in a manifest in memory, saving pass or fail, first mismatch and timing of each as JSON: 
+prompt> python -m assembler --grade manifest.txt [--results data/output/grades.json] [--jobs 8]
+To disassemble a .hack or binary file to stdout: prompt> python -m assembler --disassemble data/output/Pong.hack
+To serve JSON-line requests on stdin and stdout, or on a Unix socket: prompt> python -m assembler --serve [--socket PATH]
+To print phase timings and counters as JSON instead of saved messages: prompt> python -m assembler filename.asm --stats
+To restore unchanged files from a build cache instead of translating them: prompt> python -m assembler run_all --cache-dir .hack-cache
 """
 
-import sys, os
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from . import code
 from .parser import Parser
+from .build_cache import BuildCache, assemble
+from . import server
+from . import stream
+from . import check
+from . import grading
+from . import incremental
+from . import linker
+from . import output
+from . import verify
+from .output import formats
  
  
-def main():
-    if sys.argv[1] == 'run_all':
-        for root, dirs, files in os.walk('data/input/'):
-            for file in files:
-                if file.endswith('.asm'):
-                    fname = os.path.join(root, file)
-                    Parser(fname, auto_run=True)
+def parse_args(args=None):
+    arg_parser = argparse.ArgumentParser(prog='assembler', description='Hack assembler')
+    arg_parser.add_argument('fname', nargs='?', help="file name in input folder, run_all to translate all files there, or - to stream stdin to stdout")
+    arg_parser.add_argument('--watch', metavar='DIR', default=None, help='keep translating .asm files in DIR as they change')
+    arg_parser.add_argument('--object', action='store_true', help='save relocatable object file .obj instead of translating')
+    arg_parser.add_argument('--link', nargs='+', metavar=('NAME', 'OBJ'), default=None, 
+                            help='link object files into NAME in output folder, in the order given')
+    arg_parser.add_argument('--verify', nargs=2, metavar=('EXPECTED', 'ACTUAL'), default=None, 
+                            help='compare ACTUAL file with EXPECTED file and print differing words decoded')
+    arg_parser.add_argument('--limit', type=int, default=10, help='differences printed by --verify, or failures by --grade (default: 10)')
+    arg_parser.add_argument('--grade', metavar='MANIFEST', default=None, 
+                            help='translate source files listed with expected files in MANIFEST in memory, and compare their words')
+    arg_parser.add_argument('--results', default=None, help='JSON results file for --grade (default: grades.json in output folder)')
+    arg_parser.add_argument('--disassemble', metavar='FILE', default=None, help='print .hack or binary FILE as assembly')
+    arg_parser.add_argument('--serve', action='store_true', help='serve JSON-line requests on stdin and stdout, or on --socket')
+    arg_parser.add_argument('--socket', default=None, help='Unix socket path for --serve')
+    arg_parser.add_argument('--interval', type=float, default=0.5, help='seconds between checks for changes in watch mode (default: 0.5)')
+    arg_parser.add_argument('--input-dir', default='data/input/', help='folder with .asm files (default: data/input/)')
+    arg_parser.add_argument('--output-dir', default='data/output/', help='folder for translated files (default: data/output/)')
+    arg_parser.add_argument('--jobs', type=int, default=None, 
+                            help='worker processes: for run_all and --serve (default: number of CPUs), or to translate one file in chunks')
+    arg_parser.add_argument('--single-pass', action='store_true', help='translate in one pass with label backpatching')
+    arg_parser.add_argument('--mapped', action='store_true', help='scan memory-mapped input as bytes, without a string per line')
+    arg_parser.add_argument('--numpy', action='store_true', help='translate with NumPy in bulk, if installed')
+    arg_parser.add_argument('--optimize', action='store_true', help='apply peephole optimizer rules before labels are given addresses')
+    arg_parser.add_argument('--dead-code', action='store_true', help='drop blocks that cannot be reached from the start, and list them')
+    arg_parser.add_argument('--check', action='store_true', 
+                            help='only check for unknown mnemonics, malformed or duplicate labels, values over 32767 and ROM overflow')
+    arg_parser.add_argument('--pipelined', action='store_true', 
+                            help='read, encode and write in threaded stages connected by bounded queues, and report stalls')
+    arg_parser.add_argument('--block-size', type=int, default=1024, help='KB read per block with --pipelined (default: 1024)')
+    arg_parser.add_argument('--queue-size', type=int, default=4, help='blocks or chunks held by each --pipelined queue (default: 4)')
+    arg_parser.add_argument('--incremental', action='store_true', 
+                            help='encode only label blocks changed since previous build, using its source map filename.map.json')
+    arg_parser.add_argument('--format', default='hack', 
+                            help='comma separated output formats: ' + ', '.join(formats) + ' (default: hack)')
+    arg_parser.add_argument('--cache-dir', default=None, help='folder for build cache of translated files (default: no cache)')
+    arg_parser.add_argument('--cache-size', type=float, default=256, help='build cache size limit in MB (default: 256)')
+    arg_parser.add_argument('--stats', action='store_true', help='print phase timings and counters as JSON')
+    args = arg_parser.parse_args(args)
+    if args.fname is None and args.watch is None and not args.serve and args.link is None and args.verify is None and args.disassemble is None \
+       and args.grade is None:
+        arg_parser.error('file name, run_all, --watch, --link, --verify, --disassemble, --grade or --serve is required')
+    if args.link is not None and len(args.link) < 2:
+        arg_parser.error('--link needs an output name and at least one object file')
+    if args.incremental and (args.optimize or args.dead_code):
+        arg_parser.error('--incremental cannot be combined with --optimize or --dead-code, which change addresses of unedited blocks')
+    
+    args.format = [name.strip() for name in args.format.split(',') if name.strip()]
+    for name in args.format:
+        if name not in formats:
+            arg_parser.error('unknown output format: ' + name)
+    if args.fname == '-' and (len(args.format) != 1 or args.format[0] not in stream.formats):
+        arg_parser.error('streaming to stdout needs one of these formats: ' + ', '.join(stream.formats))
+    return args
+    
+
+def assemble_file(fname, output_dir, options, cache_dir=None):
+    """
+    Translates one file, without printing, and returns (fname, seconds, error, cached, stats). 
+    Error is None on success, or exception text on failure. Cached is True if files were restored from 
+    build cache in cache_dir. Stats is Parser.statistics() if stats option is set and file was translated, 
+    otherwise None. Runs in a worker process for run_all.
+    """
+    
+    start = time.perf_counter()
+    cached = False
+    stats = None
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        if cache_dir is not None:
+            cached = assemble(BuildCache(cache_dir), fname, output_dir=output_dir, verbose=False, **options)
+        else:
+            p = Parser(fname, auto_run=True, output_dir=output_dir, verbose=False, **options)
+            if options.get('stats'):
+                stats = p.statistics()
+        error = None
+    except Exception as e:
+        error = type(e).__name__ + ': ' + str(e)
+    return fname, time.perf_counter() - start, error, cached, stats
+    
+
+def run_all(input_dir='data/input/', output_dir='data/output/', jobs=None, cache_dir=None, **options):
+    """
+    Translates all .asm files under input_dir into matching folders under output_dir, 
+    spread across a pool of jobs worker processes. Options are passed on to Parser.
+    Returns list of (fname, seconds, error, cached, stats) results, sorted by fname.
+    """
+    
+    tasks = []
+    for root, dirs, files in os.walk(input_dir):
+        for file in files:
+            if file.endswith('.asm'):
+                fname = os.path.join(root, file)
+                tasks.append((fname, os.path.join(output_dir, os.path.relpath(root, input_dir)), options, cache_dir))
+                
+    if jobs == 1 or len(tasks) < 2:
+        results = [assemble_file(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(assemble_file, *zip(*tasks)))
+            
+    return sorted(results, key=lambda result: result[0])
+    
+    
+def changed_files(input_dir, mtimes):
+    """
+    Returns sorted list of .asm files under input_dir that are new or changed since last check.
+    Mtimes is a dictionary of file name to (mtime, size), updated in place. Removed files are dropped from it.
+    """
+    
+    current = {}
+    for root, dirs, files in os.walk(input_dir):
+        for file in files:
+            if file.endswith('.asm'):
+                fname = os.path.join(root, file)
+                try:
+                    stat = os.stat(fname)
+                except FileNotFoundError:
+                    continue
+                current[fname] = (stat.st_mtime_ns, stat.st_size)
+                
+    changed = sorted(fname for fname, mtime in current.items() if mtimes.get(fname) != mtime)
+    mtimes.clear()
+    mtimes.update(current)
+    return changed
+    
+    
+def watch(input_dir, output_dir='data/output/', interval=0.5, polls=None, **options):
+    """
+    Polls input_dir every interval seconds and translates new or changed .asm files into matching folders 
+    under output_dir, printing latency of each rebuild. Files that fail are reported and watching goes on.
+    Runs until interrupted, or for polls checks if set. Options are passed on to Parser.
+    """
+    
+    #one instruction cache stays warm across rebuilds
+    options.setdefault('cache', code.InstructionCache())
+    mtimes = {}
+    count = 0
+    
+    print('\nWatching ' + input_dir + ' for changes to .asm files')
+    while polls is None or count < polls:
+        if count:
+            time.sleep(interval)
+        count += 1
+        
+        for fname in changed_files(input_dir, mtimes):
+            folder = os.path.join(output_dir, os.path.relpath(os.path.dirname(fname), input_dir))
+            fname, seconds, error, cached, stats = assemble_file(fname, folder, options)
+            if error is None:
+                print('Rebuilt ' + fname + ' in ' + format(seconds * 1000, '.1f') + ' ms')
+            else:
+                print('FAILED ' + fname + ' after ' + format(seconds * 1000, '.1f') + ' ms: ' + error)
+                
+    
+def print_summary(results, seconds):
+    """
+    Prints one summary of run_all results, with per file timing and failures. No return.
+    """
+    
+    failures = [result for result in results if result[2] is not None]
+    print('\nTranslated ' + str(len(results) - len(failures)) + ' of ' + str(len(results)) + 
+          ' files in ' + format(seconds, '.3f') + 's, ' + str(len(failures)) + ' failed')
+    for fname, file_seconds, error, cached, stats in results:
+        status = 'FAILED ' + error if error is not None else 'cached' if cached else 'ok'
+        print(format(file_seconds, '9.3f') + 's  ' + fname + '  ' + status)
+ 
+ 
+def main(args=None):
+    args = parse_args(args)
+    options = {'single_pass': args.single_pass, 'mapped': args.mapped, 'vectorized': args.numpy, 'optimize': args.optimize, 'dead_code': args.dead_code, 
+               'pipelined': args.pipelined, 'block_size': args.block_size * 1024, 'queue_size': args.queue_size, 'formats': args.format, 'stats': args.stats}
+    
+    if args.serve:
+        server.run(args.jobs, args.socket)
+        return
+        
+    if args.verify is not None:
+        differences = verify.compare(*args.verify, limit=args.limit)
+        if differences:
+            sys.stdout.write(verify.report(differences))
+            sys.exit(1)
+        print('\n' + args.verify[1] + ' matches ' + args.verify[0])
+        return
+        
+    if args.grade is not None:
+        start = time.perf_counter()
+        results = grading.grade_all(grading.read_manifest(args.grade), args.jobs)
+        seconds = time.perf_counter() - start
+        results_file = args.results or os.path.join(args.output_dir, 'grades.json')
+        os.makedirs(os.path.dirname(results_file) or '.', exist_ok=True)
+        grading.write_results(results, results_file, seconds)
+        counts = grading.summary(results)
+        print('\nGraded ' + str(counts['submissions']) + ' submissions in ' + format(seconds, '.3f') + 's: ' + 
+              str(counts['passed']) + ' passed, ' + str(counts['failed']) + ' failed, ' + str(counts['errors']) + ' errors')
+        for result in [result for result in results if not result['passed']][: args.limit]:
+            mismatch = result['mismatch']
+            print('  ' + result['source'] + '  ' + (result['error'] if result['error'] is not None else 
+                  'ROM[' + str(mismatch['rom']) + '] line ' + str(mismatch['line']) + ': expected ' + 
+                  mismatch['expected_text'] + ', got ' + mismatch['actual_text']))
+        print('\nResults saved to ' + results_file)
+        if counts['passed'] < counts['submissions']:
+            sys.exit(1)
+        return
+        
+    if args.disassemble is not None:
+        sys.stdout.write(verify.disassemble(verify.read_words(args.disassemble)))
+        return
+        
+    if args.link is not None:
+        words = linker.link([linker.ObjectFile.load(fname) for fname in args.link[1:]])
+        os.makedirs(args.output_dir, exist_ok=True)
+        for format_name in args.format:
+            fname = os.path.join(args.output_dir, args.link[0] + formats[format_name][0])
+            output.write(words, fname, format_name)
+            print('\n' + os.path.basename(fname) + ' linked file saved to folder at ' + os.path.join(args.output_dir, ''))
+        return
+        
+    if args.object:
+        fname = os.path.join(args.input_dir, args.fname)
+        os.makedirs(args.output_dir, exist_ok=True)
+        p = Parser(fname, output_dir=args.output_dir)
+        object_file = p.translation_file('.obj')
+        linker.compile_module(p).save(object_file)
+        print('\n' + os.path.basename(object_file) + ' object file saved to folder at ' + os.path.dirname(object_file) + '/')
+        return
+        
+    if args.check:
+        if args.fname == '-':
+            results = [('<stdin>', check.check_lines(line.rstrip('\r\n') for line in sys.stdin))]
+        elif args.fname == 'run_all':
+            results = check.check_all(args.input_dir)
+        else:
+            fname = os.path.join(args.input_dir, args.fname)
+            results = [(fname, check.check_file(fname))]
+        for fname, diagnostics in results:
+            sys.stdout.write(check.report(fname, diagnostics))
+        failed = [fname for fname, diagnostics in results if diagnostics]
+        print('\nChecked ' + str(len(results)) + ' files: ' + str(sum(len(diagnostics) for fname, diagnostics in results)) + 
+              ' problems in ' + str(len(failed)) + ' files')
+        if failed:
+            sys.exit(1)
+        return
+        
+    if args.fname == '-':
+        stream.run(format_name=args.format[0])
+        return
+        
+    if args.watch is not None:
+        try:
+            watch(args.watch, args.output_dir, args.interval, **options)
+        except KeyboardInterrupt:
+            pass
+        return
+        
+    cache = None
+    if args.cache_dir is not None:
+        cache = BuildCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+    
+    if args.fname == 'run_all':
+        start = time.perf_counter()
+        results = run_all(args.input_dir, args.output_dir, args.jobs, args.cache_dir, **options)
+        seconds = time.perf_counter() - start
+        if args.stats:
+            report = {'seconds': seconds, 'files': [
+                {'file': fname, 'seconds': file_seconds, 'error': error, 'cached': cached, 'stats': stats} 
+                for fname, file_seconds, error, cached, stats in results]}
+        else:
+            print_summary(results, seconds)
+        if cache is not None:
+            cache.hits = sum(1 for result in results if result[3])
+            cache.misses = sum(1 for result in results if not result[3] and result[2] is None)
+        failed = any(result[2] is not None for result in results)
     
     else:
-        fname = 'data/input/' + sys.argv[1]
-        Parser(fname, auto_run=True)
\ No newline at end of file
+        fname = os.path.join(args.input_dir, args.fname)
+        if args.incremental:
+            words, summary = incremental.build(fname, args.output_dir, args.format, verbose=not args.stats)
+            report = {'file': fname, 'incremental': summary}
+        elif cache is not None:
+            cached = assemble(cache, fname, output_dir=args.output_dir, jobs=args.jobs, verbose=not args.stats, **options)
+            report = {'file': fname, 'cached': cached}
+        else:
+            p = Parser(fname, auto_run=True, output_dir=args.output_dir, jobs=args.jobs, verbose=not args.stats, **options)
+            report = p.statistics() if args.stats else None
+        failed = False
+        
+    if cache is not None:
+        cache.evict()
+        if args.stats:
+            report['build_cache'] = cache.stats()
+        else:
+            print(cache.stats())
+    if args.stats:
+        print(json.dumps(report, indent=2))
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*- 
+
+"""
+BuildCache class to keep translated files on disk, keyed by a hash of source bytes and assembler version,
+so unchanged .asm files are restored instead of translated again.
+"""
+
+import hashlib
+import os
+import shutil
+import assembler
+from assembler.parser import Parser
+
+
+class BuildCache:
+    """
+    Stores translated files in a cache folder, one file per source hash and output format, 
+    with hit and miss counters. Least recently used files are evicted when cache grows over max_bytes.
+    """
+    
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self._directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        
+    def key(self, source, variant=''):
+        """
+        Returns hash key for source bytes and assembler version. 
+        Variant names options that change translated words, such as 'optimize', so they are cached apart.
+        """
+        
+        version = assembler.__version__ + ('+' + variant if variant else '')
+        return hashlib.sha256(version.encode() + b'\0' + source).hexdigest()
+        
+    def _entry(self, key, format_name):
+        return os.path.join(self._directory, key + '.' + format_name)
+        
+    def restore(self, key, files):
+        """
+        Copies cached files for key to their paths in files, a dictionary of output format name to path.
+        Returns True and counts a hit only if all formats were cached, otherwise counts a miss and returns False.
+        """
+        
+        entries = {format_name: self._entry(key, format_name) for format_name in files}
+        if not all(os.path.exists(entry) for entry in entries.values()):
+            self.misses += 1
+            return False
+            
+        for format_name, entry in entries.items():
+            shutil.copyfile(entry, files[format_name])
+            os.utime(entry) #mark as recently used, for eviction
+        self.hits += 1
+        return True
+        
+    def store(self, key, files):
+        """
+        Copies translated files, a dictionary of output format name to path, into cache for key. No return.
+        """
+        
+        for format_name, fname in files.items():
+            entry = self._entry(key, format_name)
+            temporary = entry + '.' + str(os.getpid()) + '.tmp'
+            shutil.copyfile(fname, temporary)
+            os.replace(temporary, entry)
+            
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self._directory):
+            path = os.path.join(self._directory, name)
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+        
+    def evict(self):
+        """
+        Removes least recently used files until cache size is at most max_bytes. Returns number of files removed.
+        """
+        
+        entries = sorted(self._entries())
+        size = sum(entry[1] for entry in entries)
+        removed = 0
+        for mtime, entry_size, path in entries:
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= entry_size
+            removed += 1
+        return removed
+        
+    def stats(self):
+        """
+        Returns one line with cache hits, misses, number of files and size.
+        """
+        
+        entries = self._entries()
+        size = sum(entry[1] for entry in entries)
+        return ('Build cache: ' + str(self.hits) + ' hits, ' + str(self.misses) + ' misses, ' + str(len(entries)) + 
+                ' files, ' + format(size / 1048576, '.1f') + ' of ' + format(self.max_bytes / 1048576, '.1f') + ' MB')
+                
+                
+def assemble(cache, fname, **options):
+    """
+    Restores translated files for fname from cache, or translates it with Parser and stores the result.
+    Options are passed on to Parser. Returns True on cache hit.
+    """
+    
+    with open(fname, 'rb') as f:
+        variant = '+'.join(name for name in ('optimize', 'dead_code') if options.get(name))
+        key = cache.key(f.read(), variant)
+    files = Parser(fname, content=[], **options).output_files()
+    if cache.restore(key, files):
+        return True
+        
+    Parser(fname, auto_run=True, **options)
+    cache.store(key, files)
+    return False
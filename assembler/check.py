@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+Validate-only mode: checks every line of an assembly program in one pass, collecting all diagnostics
+with their line numbers instead of stopping at the first error, and writes no output.
+Instruction lines already seen valid, and C-commands in any valid spelling, are accepted with one set lookup.
+"""
+
+import os
+import re
+from assembler import code
+from assembler.symbol_table import SymbolTable
+
+#largest A-command value, and number of words in ROM
+MAX_VALUE = 32767
+ROM_SIZE = 32768
+
+#symbols are letters, digits, _ . $ and :, not starting with a digit
+_symbol = re.compile(r'[A-Za-z_.$:][\w.$:]*\Z', re.ASCII)
+
+_predefined = frozenset(SymbolTable()._table)
+
+_overflow = 'instruction ' + str(ROM_SIZE) + ' does not fit in ' + str(ROM_SIZE) + '-word ROM'
+
+
+def _spelling(d, c, j):
+    return (d + '=' if d != 'null' else '') + c + (';' + j if j != 'null' else '')
+
+
+#every valid C-command spelling without white space
+_valid = frozenset(_spelling(*fields) for fields in code.c_instruction)
+
+
+def check_c_command(command):
+    """
+    Returns list of (code, message) problems with C-command text, without comment or white space:
+    unknown dest, comp or jump mnemonics. Returns an empty list for a valid command.
+    """
+
+    dest, equals, rest = command.partition('=')
+    if not equals:
+        dest, rest = 'null', dest
+    comp, semicolon, jump = rest.partition(';')
+    problems = []
+    if dest not in code.dest or dest == 'null' and equals:
+        problems.append(('unknown-dest', "unknown dest '" + dest + "' in " + command))
+    if comp not in code.comp:
+        problems.append(('unknown-comp', "unknown comp '" + comp + "' in " + command))
+    if semicolon and (jump not in code.jump or jump == 'null'):
+        problems.append(('unknown-jump', "unknown jump '" + jump + "' in " + command))
+    return problems
+
+
+def check_lines(lines):
+    """
+    Returns list of (line number, code, message) diagnostics for lines of assembly, in line order. Codes are
+    unknown-dest, unknown-comp, unknown-jump, malformed-label, duplicate-label, malformed-symbol, value-range and rom-overflow.
+    """
+
+    diagnostics = []
+    valid = set(_valid) #instruction lines known to be valid, as written
+    labels = {}
+    count = 0
+
+    for number, text in enumerate(lines, 1):
+        if text in valid:
+            count += 1
+            if count == ROM_SIZE + 1:
+                diagnostics.append((number, 'rom-overflow', _overflow))
+            continue
+        line = text.split('//')[0].strip()
+        if not line:
+            continue
+
+        if line[0] == '(':
+            name = line[1 : line.find(')')].strip() if ')' in line else None
+            if name is None or line[-1] != ')' or not _symbol.match(name):
+                diagnostics.append((number, 'malformed-label', 'malformed label ' + line))
+            elif name in labels:
+                diagnostics.append((number, 'duplicate-label', 'duplicate label ' + name + ', first defined at line ' + str(labels[name])))
+            elif name in _predefined:
+                diagnostics.append((number, 'duplicate-label', 'label ' + name + ' redefines predefined symbol'))
+            else:
+                labels[name] = number
+            continue
+
+        count += 1
+        if count == ROM_SIZE + 1:
+            diagnostics.append((number, 'rom-overflow', _overflow))
+
+        if line[0] == '@':
+            value = line[1:]
+            if value.isdigit():
+                if int(value) > MAX_VALUE:
+                    diagnostics.append((number, 'value-range', 'A-command value ' + value + ' is over ' + str(MAX_VALUE)))
+                    continue
+            elif not _symbol.match(value):
+                diagnostics.append((number, 'malformed-symbol', 'malformed A-command ' + line))
+                continue
+            valid.add(text)
+            continue
+
+        command = line.replace(' ', '').replace('\t', '')
+        if command in valid:
+            valid.add(text)
+            continue
+        for problem_code, message in check_c_command(command):
+            diagnostics.append((number, problem_code, message))
+
+    return diagnostics
+
+
+def check_file(fname):
+    """
+    Returns list of (line number, code, message) diagnostics for assembly file fname.
+    """
+
+    with open(fname) as f:
+        return check_lines(f.read().splitlines())
+
+
+def check_all(input_dir):
+    """
+    Returns list of (fname, diagnostics) for each .asm file under input_dir, sorted by fname.
+    """
+
+    fnames = [os.path.join(root, file) for root, dirs, files in os.walk(input_dir) for file in files if file.endswith('.asm')]
+    return [(fname, check_file(fname)) for fname in sorted(fnames)]
+
+
+def report(fname, diagnostics):
+    """
+    Returns text with one fname:line: message line per diagnostic.
+    """
+
+    return ''.join(fname + ':' + str(number) + ': ' + message + '\n' for number, problem_code, message in diagnostics)
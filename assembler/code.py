@@ -5,6 +5,9 @@ Translates assembly language c-instruction mnemonics into binary codes.
 There is a mapping dictionary for each of the c-instruction's three fields: dest, comp and jump
 """
 
+_text_table = None
+_mnemonic_table = None
+
 
 dest = {
     'null': '000',
@@ -57,4 +60,102 @@ jump = {
     'JNE': '101',
     'JLE': '110',
     'JMP': '111'
-}
\ No newline at end of file
+}
+
+#every valid dest, comp and jump combination, built once, mapped to its full c-instruction 16-bit word
+c_instruction = {
+    (d, c, j): int('111' + comp[c] + dest[d] + jump[j], 2)
+    for d in dest for c in comp for j in jump
+}
+
+
+#reverse of c_instruction, 16-bit word mapped to its c-instruction mnemonic, with null fields left out
+c_mnemonic = {
+    word: (d + '=' if d != 'null' else '') + c + (';' + j if j != 'null' else '')
+    for (d, c, j), word in c_instruction.items()
+}
+
+
+def mnemonic(word):
+    """
+    Returns assembly mnemonic for 16-bit word: @value for A-instructions, dest=comp;jump for C-instructions, 
+    or a comment naming the word if it is not a valid instruction.
+    """
+    
+    if word < 0x8000:
+        return '@' + str(word)
+    return c_mnemonic.get(word, '// invalid ' + format(word, '016b'))
+    
+
+def mnemonic_table():
+    """
+    Returns tuple mapping each of the 65536 16-bit words to its mnemonic() line, including newline.
+    Table is built on first call and then reused.
+    """
+    
+    global _mnemonic_table
+    if _mnemonic_table is None:
+        _mnemonic_table = tuple(mnemonic(word) + '\n' for word in range(1 << 16))
+    return _mnemonic_table
+    
+
+def text_table():
+    """
+    Returns tuple mapping each of the 65536 16-bit words to its .hack text line, including newline.
+    Table is built on first call and then reused.
+    """
+    
+    global _text_table
+    if _text_table is None:
+        _text_table = tuple(format(word, '016b') + '\n' for word in range(1 << 16))
+    return _text_table
+    
+
+def to_text(words):
+    """
+    Returns .hack text for an iterable of 16-bit words, such as array('H'), as one string.
+    """
+    
+    return ''.join(map(text_table().__getitem__, words))
+
+
+class InstructionCache:
+    """
+    Bounded cache from source text of a c-instruction to its 16-bit word, with hit and miss counters.
+    When full, the oldest entry is evicted to make room for a new one.
+    """
+    
+    def __init__(self, maxsize=4096):
+        self._table = {}
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, command):
+        """
+        Returns word cached for command text, or None if not cached. 
+        Counts each call as a hit or a miss.
+        """
+        
+        word = self._table.get(command)
+        if word is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return word
+        
+    def put(self, command, word):
+        """
+        Caches word for command text. No return.
+        """
+        
+        if len(self._table) >= self.maxsize:
+            del self._table[next(iter(self._table))]
+        self._table[command] = word
+        
+    def info(self):
+        """
+        Returns dictionary with cache hits, misses, current size and maxsize.
+        """
+        
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._table), 'maxsize': self.maxsize}
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch grading: translates many submitted programs in memory and compares their words with expected translated files,
+without writing any output. Submissions are spread across a pool of worker processes, each keeping its
+c-instruction cache and expected words warm across the submissions it grades. Results are saved in one JSON file.
+
+Manifest: a text file with one "source expected" pair of paths per line, or a .json file with a list of
+[source, expected] pairs or {"source": ..., "expected": ...} objects. Relative paths are taken from the manifest folder.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from assembler import api
+from assembler import code
+from assembler import ir
+from assembler import verify
+
+#kept warm in each worker process, along with code tables and predefined symbols
+_cache = code.InstructionCache()
+_expected = {} #expected file path: array('H') of its words
+
+
+def read_manifest(fname):
+    """
+    Returns list of (source, expected) paths in manifest fname. Blank lines and lines starting with # are skipped.
+    """
+
+    folder = os.path.dirname(fname)
+    with open(fname) as f:
+        if fname.endswith('.json'):
+            entries = [(entry['source'], entry['expected']) if isinstance(entry, dict) else tuple(entry) for entry in json.load(f)]
+        else:
+            entries = [tuple(line.split()) for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+    pairs = []
+    for number, entry in enumerate(entries, 1):
+        if len(entry) != 2:
+            raise ValueError(fname + ': entry ' + str(number) + ' is not a source and expected pair')
+        pairs.append(tuple(os.path.normpath(os.path.join(folder, path)) for path in entry))
+    return pairs
+
+
+def expected_words(fname):
+    """
+    Returns words of expected translated file fname, .hack or binary, reading it only once per worker process.
+    """
+
+    words = _expected.get(fname)
+    if words is None:
+        words = _expected[fname] = verify.read_words(fname)
+    return words
+
+
+def first_mismatch(words, expected):
+    """
+    Returns dictionary of ROM address, and expected and actual words with mnemonics, where words first differ
+    from expected, or None if they are equal. A word missing from the shorter program is None.
+    """
+
+    if words == expected:
+        return None
+    address = next((address for address, (word, expected_word) in enumerate(zip(words, expected)) if word != expected_word),
+                   min(len(words), len(expected)))
+    expected_word = expected[address] if address < len(expected) else None
+    actual_word = words[address] if address < len(words) else None
+    return {'rom': address, 'expected': expected_word, 'actual': actual_word,
+            'expected_text': verify.describe(expected_word), 'actual_text': verify.describe(actual_word)}
+
+
+def source_line(program, address):
+    """
+    Returns 1-based source line number of command at ROM address in tokenized program, or None past its end.
+    """
+
+    for kind, line in zip(program.kinds, program.lines):
+        if kind == ir.L_COMMAND:
+            continue
+        if not address:
+            return line + 1
+        address -= 1
+    return None
+
+
+def grade(source, expected):
+    """
+    Translates source file in memory and compares its words with expected file. Returns result dictionary with
+    source and expected paths, passed flag, error text if either file could not be read or source could not be translated,
+    number of words, first mismatch with its source line, and seconds taken. Runs in a worker process for grade_all().
+    """
+
+    start = time.perf_counter()
+    result = {'source': source, 'expected': expected, 'passed': False, 'error': None, 'words': None, 'mismatch': None}
+    try:
+        with open(source, 'rb') as f:
+            p = api.parse(f.read(), _cache)
+        words = p.encode_program()
+        result['words'] = len(words)
+        mismatch = first_mismatch(words, expected_words(expected))
+        if mismatch is not None:
+            mismatch['line'] = source_line(p.tokenize(), mismatch['rom'])
+        result['mismatch'] = mismatch
+        result['passed'] = mismatch is None
+    except Exception as e:
+        result['error'] = type(e).__name__ + ': ' + str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _grade_pair(pair):
+    return grade(*pair)
+
+
+def grade_all(pairs, jobs=None):
+    """
+    Grades each (source, expected) pair across a pool of jobs worker processes, default number of CPUs,
+    or in this process if jobs is 1. Returns list of result dictionaries, in order of pairs.
+    """
+
+    if jobs == 1 or len(pairs) < 2:
+        return [grade(*pair) for pair in pairs]
+    jobs = jobs or os.cpu_count()
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_grade_pair, pairs, chunksize=max(1, len(pairs) // (jobs * 4))))
+
+
+def summary(results, seconds=None):
+    """
+    Returns dictionary of counts of submissions, passed, failed and errors, and total seconds if given.
+    """
+
+    counts = {
+        'submissions': len(results),
+        'passed': sum(1 for result in results if result['passed']),
+        'failed': sum(1 for result in results if not result['passed'] and result['error'] is None),
+        'errors': sum(1 for result in results if result['error'] is not None)
+    }
+    if seconds is not None:
+        counts['seconds'] = seconds
+    return counts
+
+
+def write_results(results, fname, seconds=None):
+    """
+    Saves summary and results to fname as JSON. No return.
+    """
+
+    with open(fname, 'w') as f:
+        f.write(json.dumps({'summary': summary(results, seconds), 'results': results}, indent=1))
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental reassembly from a source map saved alongside translated files.
+Source is split into label blocks, each starting at a label line. The source map records a hash, first line
+and first ROM address of each block, the label table, the variable allocation order, and the ROM address and symbol
+of each A-command with a symbol. On the next build, only runs of blocks whose bytes changed are encoded again.
+Unchanged runs reuse their words from the previous output, and symbol addresses are patched for moved labels.
+"""
+
+import bisect
+import difflib
+import hashlib
+import json
+import os
+import re
+from array import array
+import assembler
+from assembler import code
+from assembler import output
+from assembler import verify
+from assembler.parser import Parser, encode_region
+from assembler.symbol_table import SymbolTable
+
+MAP_VERSION = 1
+
+#output formats that previous words can be read back from
+_readable = ('hack', 'bin', 'bin-le')
+
+_label = re.compile(rb'^[ \t]*\(', re.MULTILINE)
+
+
+def split_blocks(data):
+    """
+    Returns list of byte offsets in source bytes data where blocks start: 0, and each label line.
+    """
+
+    starts = [match.start() for match in _label.finditer(data)]
+    if not starts or starts[0]:
+        starts.insert(0, 0)
+    return starts
+
+
+def block_hash(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def words_hash(words):
+    return hashlib.blake2b(output.to_binary(words), digest_size=16).hexdigest()
+
+
+def diff(old, new):
+    """
+    Returns difflib opcodes turning list old into list new. Common leading and trailing items are matched first, 
+    so only the changed middle is compared with difflib.
+    """
+    
+    prefix = 0
+    limit = min(len(old), len(new))
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+        
+    opcodes = [('equal', 0, prefix, 0, prefix)] if prefix else []
+    matcher = difflib.SequenceMatcher(None, old[prefix : len(old) - suffix], new[prefix : len(new) - suffix], autojunk=False)
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        opcodes.append((tag, old_start + prefix, old_end + prefix, new_start + prefix, new_end + prefix))
+    if suffix:
+        opcodes.append(('equal', len(old) - suffix, len(old), len(new) - suffix, len(new)))
+    return opcodes
+    
+
+def load(map_file, files):
+    """
+    Returns (source_map, words) of previous build, or (None, None) if its source map or a readable output file
+    is missing, or was saved by another version, or the output file no longer holds the words the map was saved with.
+    """
+
+    readable = [format_name for format_name in _readable if format_name in files]
+    if not readable or not os.path.exists(map_file) or not os.path.exists(files[readable[0]]):
+        return None, None
+    with open(map_file) as f:
+        source_map = json.load(f)
+    if source_map.get('version') != MAP_VERSION or source_map.get('assembler') != assembler.__version__:
+        return None, None
+
+    words = verify.read_words(files[readable[0]], readable[0])
+    if words_hash(words) != source_map['words']:
+        return None, None
+    return source_map, words
+
+
+class Layout:
+    """
+    New program assembled from runs of blocks: words, first ROM address and label of each block,
+    and ROM address and name of each A-command symbol, in address order.
+    """
+
+    __slots__ = ('words', 'rom', 'labels', 'references', 'symbols', 'encoded', '_reused')
+
+    def __init__(self):
+        self.words = array('H')
+        self.rom = []
+        self.labels = []
+        self.references = array('L')
+        self.symbols = []
+        self.encoded = 0 #blocks encoded, not reused
+        self._reused = [] #(first, last) indices of references reused with words already patched
+
+    def reuse(self, previous, previous_words, start, end):
+        """
+        Appends previous blocks start to end, with their words, labels and symbols. No return.
+        """
+
+        rom = previous['rom']
+        old_start = rom[start]
+        old_end = rom[end] if end < len(rom) else len(previous_words)
+        shift = len(self.words) - old_start
+        self.words.extend(previous_words[old_start : old_end])
+        self.rom.extend(address + shift for address in rom[start : end])
+        self.labels.extend(previous['labels'][start : end])
+
+        references = previous['references']
+        first = bisect.bisect_left(references, old_start)
+        last = bisect.bisect_left(references, old_end)
+        names = previous['names']
+        self._reused.append((len(self.references), len(self.references) + last - first))
+        self.references.extend(address + shift for address in references[first : last])
+        self.symbols.extend(names[name_id] for name_id in previous['symbols'][first : last])
+
+    def encode(self, data, starts, start, end, cache=None):
+        """
+        Encodes new blocks start to end of source bytes data, with block byte offsets in starts, and appends them. No return.
+        """
+
+        base = len(self.words)
+        stop = starts[end] if end < len(starts) else len(data)
+        lines = [line.strip() for line in data[starts[start] : stop].decode().split('\n')]
+        words, labels, offsets, symbols = encode_region(lines, cache)
+        self.words.extend(words)
+        self.references.extend(base + offset for offset in offsets)
+        self.symbols.extend(symbols)
+
+        #every block starts at a label, except first block of source if it does not start with one
+        labels = iter(labels)
+        for index in range(start, end):
+            if index == 0 and not _label.match(data):
+                self.rom.append(base)
+                self.labels.append(None)
+            else:
+                label, offset = next(labels)
+                self.rom.append(base + offset)
+                self.labels.append(label)
+        self.encoded += end - start
+
+    def link(self, label_table=None):
+        """
+        Patches each A-command symbol with its address, from labels or variables allocated from 16 in order of
+        first appearance. Returns (symbols, variables): SymbolTable, and list of variables in order of allocation.
+        Pass label_table of previous build to patch reused words only for labels that moved. 
+        Reused words with variables are correct as long as variable allocation order is unchanged.
+        """
+
+        symbols = SymbolTable()
+        for label, address in zip(self.labels, self.rom):
+            if label is not None:
+                symbols.add_entry(label, address)
+        variables = []
+        for name in self.symbols:
+            if not symbols.contains(name):
+                symbols.add_entry(name, 16 + len(variables))
+                variables.append(name)
+
+        moved = None
+        if label_table is not None:
+            addresses = {label: symbols.get_address(label) for label in self.labels if label is not None}
+            moved = {label: address for label, address in addresses.items() if label_table.get(label) != address}
+        
+        words = self.words
+        references = self.references
+        names = self.symbols
+        patched = 0
+        for first, last in self._reused + [(len(references), len(references))]:
+            for index in range(patched, first):
+                words[references[index]] = symbols.get_address(names[index]) & 0x7FFF
+            if moved is None:
+                patched = first
+                continue
+            if moved:
+                for index in range(first, last):
+                    if names[index] in moved:
+                        words[references[index]] = moved[names[index]] & 0x7FFF
+            patched = last
+        return symbols, variables
+
+
+def assemble(data, starts, opcodes, previous=None, previous_words=None, cache=None):
+    """
+    Returns linked (layout, symbols, variables) for source bytes data, with block byte offsets in starts.
+    Opcodes are difflib opcodes from previous block hashes to new ones: equal runs are reused from previous build,
+    and inserted or replaced runs encoded.
+    """
+
+    layout = Layout()
+    for tag, old_start, old_end, new_start, new_end in opcodes:
+        if tag == 'equal':
+            layout.reuse(previous, previous_words, old_start, old_end)
+        elif new_end > new_start:
+            layout.encode(data, starts, new_start, new_end, cache)
+    symbols, variables = layout.link(previous['label_table'] if previous is not None else None)
+    return layout, symbols, variables
+
+
+def build(fname, output_dir=None, formats=('hack',), verbose=True, cache=None):
+    """
+    Translates fname, encoding only runs of blocks changed since the source map saved by the previous build,
+    then saves translated files in each output format and a new source map, fname.map.json.
+    Falls back to a full build, encoding all blocks, if there is no usable source map or the variable allocation order changed.
+    Returns (words, summary), where summary is a dictionary of number of blocks, number encoded, and full flag.
+    """
+
+    cache = cache if cache is not None else code.InstructionCache()
+    p = Parser(fname, content=[], output_dir=output_dir, formats=formats, verbose=verbose)
+    files = p.output_files()
+    map_file = p.translation_file('.map.json')
+    with open(fname, 'rb') as f:
+        data = f.read()
+
+    starts = split_blocks(data)
+    hashes = [block_hash(data[start : end]) for start, end in zip(starts, starts[1:] + [len(data)])]
+    full = [('insert', 0, 0, 0, len(starts))]
+    previous, previous_words = load(map_file, files)
+
+    if previous is None:
+        layout, symbols, variables = assemble(data, starts, full, cache=cache)
+    else:
+        opcodes = diff(previous['hashes'], hashes)
+        if opcodes == [('equal', 0, len(hashes), 0, len(hashes))] and all(os.path.exists(path) for path in files.values()):
+            if verbose:
+                print('\nEncoded 0 of ' + str(len(hashes)) + ' blocks, output is up to date')
+            return previous_words, {'blocks': len(hashes), 'encoded': 0, 'full': False}
+
+        layout, symbols, variables = assemble(data, starts, opcodes, previous, previous_words, cache)
+        if variables != previous['variables']:
+            layout, symbols, variables = assemble(data, starts, full, cache=cache)
+
+    words = layout.words
+    saved = []
+    os.makedirs(os.path.dirname(map_file) or '.', exist_ok=True)
+    for format_name, translation_file in files.items():
+        output.write(words, translation_file, format_name)
+        saved.append(translation_file)
+
+    lines = []
+    line = 0
+    for previous_start, start in zip([0] + starts, starts):
+        line += data.count(b'\n', previous_start, start)
+        lines.append(line)
+    name_ids = {}
+    name_of = [name_ids.setdefault(name, len(name_ids)) for name in layout.symbols]
+    source_map = {
+        'version': MAP_VERSION, 'assembler': assembler.__version__, 'words': words_hash(words),
+        'hashes': hashes, 'lines': lines, 'rom': layout.rom, 'labels': layout.labels,
+        'label_table': {label: symbols.get_address(label) for label in layout.labels if label is not None},
+        'variables': variables, 'references': list(layout.references), 'symbols': name_of, 'names': list(name_ids)
+    }
+    with open(map_file, 'w') as f:
+        f.write(json.dumps(source_map, separators=(',', ':')))
+
+    summary = {'blocks': len(hashes), 'encoded': layout.encoded, 'full': layout.encoded == len(hashes)}
+    p.report(saved)
+    if verbose:
+        print('\nEncoded ' + str(summary['encoded']) + ' of ' + str(summary['blocks']) + ' blocks' +
+              (', full build' if summary['full'] else ''))
+    return words, summary
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Compact intermediate representation of an assembly program, tokenized once from its lines. 
+Commands are kept in parallel arrays of kind, operand and source line index, so passes over the program 
+do no string work. Symbol and label names, and distinct C-command spellings, are interned once each.
+"""
+
+from array import array
+
+#command kinds
+L_COMMAND = 0 #operand is index into names
+A_NUMBER = 1 #operand is 15-bit value
+A_SYMBOL = 2 #operand is index into names
+C_COMMAND = 3 #operand is index into commands
+
+
+class Program:
+    """
+    Parallel arrays kinds, operands and lines, one entry per command including labels. 
+    Names lists interned symbol and label names. Commands lists, for each distinct C-command spelling, 
+    the source line index where it first appears.
+    """
+    
+    __slots__ = ('kinds', 'operands', 'lines', 'names', 'commands', '_name_ids', '_command_ids')
+    
+    def __init__(self):
+        self.kinds = array('B')
+        self.operands = array('L')
+        self.lines = array('L')
+        self.names = []
+        self.commands = []
+        self._name_ids = {}
+        self._command_ids = {}
+        
+    def __len__(self):
+        return len(self.kinds)
+        
+    def add(self, kind, operand, line):
+        """
+        Appends a command. No return.
+        """
+        
+        self.kinds.append(kind)
+        self.operands.append(operand)
+        self.lines.append(line)
+        
+    def name_id(self, name):
+        """
+        Returns index of name in names, adding it if new.
+        """
+        
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+        
+    def command_id(self, command, line):
+        """
+        Returns index of C-command spelling in commands, adding it with its source line index if new.
+        """
+        
+        command_id = self._command_ids.get(command)
+        if command_id is None:
+            command_id = self._command_ids[command] = len(self.commands)
+            self.commands.append(line)
+        return command_id
+        
+        
+def tokenize(content):
+    """
+    Returns Program for content, a list of stripped lines. Blank lines and comments are dropped. 
+    Commands are classified the same way as Parser.command_type() and Parser.symbol().
+    """
+    
+    program = Program()
+    kinds, operands, lines = program.kinds.append, program.operands.append, program.lines.append
+    name_id, command_id = program.name_id, program.command_id
+    
+    for index, line in enumerate(content):
+        if not line:
+            continue
+        
+        #lines are stripped, so only lines starting with '/' can be comments
+        first = line[0]
+        if first == '@':
+            value = line.split(' ')[0][1:]
+            if value.isdigit():
+                kinds(A_NUMBER)
+                operands(int(value) & 0x7FFF)
+            else:
+                kinds(A_SYMBOL)
+                operands(name_id(value))
+                
+        elif first == '(':
+            kinds(L_COMMAND)
+            operands(name_id(line[1 : line.find(')')].strip()))
+            
+        elif first == '/' and line.replace(' ','').startswith('//'):
+            continue
+                
+        else:
+            kinds(C_COMMAND)
+            operands(command_id(line, index))
+            
+        lines(index)
+            
+    return program
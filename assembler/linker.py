@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Relocatable object files and a linker, so programs made of many .asm modules are rebuilt one module at a time.
+
+An object file keeps a module's encoded words, with ROM addresses relative to the module start. It lists 
+relocations (words holding a local label address), exported labels and imported symbols. Imports are either 
+labels of other modules or variables. The linker lays modules out in ROM in order, and allocates variable RAM 
+from address 16 in order of first appearance across modules, so output matches translating the modules concatenated.
+"""
+
+import base64
+import json
+import sys
+from array import array
+from assembler import ir
+from assembler import optimizer
+from assembler import symbol_table
+from assembler.parser import Parser
+
+FORMAT_VERSION = 1
+
+
+class ObjectFile:
+    """
+    Encoded words of one module, with relocations (word positions holding local ROM addresses), 
+    exports (label name to local ROM address), imports (symbol names in order of first appearance) 
+    and fixups (pairs of word position and import index).
+    """
+    
+    def __init__(self, words=None, relocations=None, exports=None, imports=None, fixups=None):
+        self.words = words if words is not None else array('H')
+        self.relocations = relocations if relocations is not None else []
+        self.exports = exports if exports is not None else {}
+        self.imports = imports if imports is not None else []
+        self.fixups = fixups if fixups is not None else []
+        
+    def to_json(self):
+        """
+        Returns object file as JSON text, with words as base64 of big-endian bytes.
+        """
+        
+        words = array('H', self.words)
+        if sys.byteorder != 'big':
+            words.byteswap()
+        return json.dumps({
+            'version': FORMAT_VERSION,
+            'words': base64.b64encode(words.tobytes()).decode(),
+            'relocations': self.relocations,
+            'exports': self.exports,
+            'imports': self.imports,
+            'fixups': [value for fixup in self.fixups for value in fixup]
+        })
+        
+    @classmethod
+    def from_json(cls, text):
+        """
+        Returns ObjectFile from JSON text made by to_json().
+        """
+        
+        data = json.loads(text)
+        if data.get('version') != FORMAT_VERSION:
+            raise ValueError('unsupported object file version: ' + str(data.get('version')))
+        words = array('H')
+        words.frombytes(base64.b64decode(data['words']))
+        if sys.byteorder != 'big':
+            words.byteswap()
+        fixups = data['fixups']
+        return cls(words, data['relocations'], data['exports'], data['imports'], list(zip(fixups[::2], fixups[1::2])))
+        
+    def save(self, fname):
+        with open(fname, 'w') as f:
+            f.write(self.to_json())
+            
+    @classmethod
+    def load(cls, fname):
+        with open(fname) as f:
+            return cls.from_json(f.read())
+            
+
+def compile_module(p):
+    """
+    Returns ObjectFile for the content of Parser p. Labels after the last command of a module 
+    point to the start of the next module.
+    """
+    
+    program = p.tokenize()
+    names = program.names
+    obj = ObjectFile()
+    
+    #labels added by the optimizer for numbers jumped to stay local to the module
+    labels = {}
+    count = 0
+    for kind, operand in zip(program.kinds, program.operands):
+        if kind == ir.L_COMMAND:
+            labels[names[operand]] = count
+            if not optimizer.jump_label(names[operand]):
+                obj.exports[names[operand]] = count
+        else:
+            count += 1
+            
+    predefined = symbol_table.SymbolTable()
+    import_ids = {}
+    words = p.encode_spellings(program)
+    
+    for kind, operand in zip(program.kinds, program.operands):
+        if kind == ir.A_NUMBER:
+            obj.words.append(operand)
+            
+        elif kind == ir.A_SYMBOL:
+            name = names[operand]
+            if name in labels:
+                obj.relocations.append(len(obj.words))
+                obj.words.append(labels[name])
+            elif predefined.contains(name):
+                obj.words.append(predefined.get_address(name))
+            else:
+                if name not in import_ids:
+                    import_ids[name] = len(obj.imports)
+                    obj.imports.append(name)
+                obj.fixups.append((len(obj.words), import_ids[name]))
+                obj.words.append(0)
+                
+        elif kind == ir.C_COMMAND:
+            obj.words.append(words[operand])
+            
+    return obj
+    
+
+def compile_file(fname, **options):
+    """
+    Returns ObjectFile for .asm file fname. Options are passed on to Parser.
+    """
+    
+    return compile_module(Parser(fname, **options))
+    
+
+def link(objects, symbols=None):
+    """
+    Lays out objects in ROM in order and returns array('H') of linked words. Exported labels are added to symbols, 
+    a SymbolTable, then imports that are not labels are allocated as variables from address 16, 
+    in order of first appearance. Raises ValueError if two objects export the same label.
+    """
+    
+    symbols = symbols if symbols is not None else symbol_table.SymbolTable()
+    total = sum(len(obj.words) for obj in objects)
+    
+    bases = []
+    exported = set()
+    base = 0
+    for obj in objects:
+        bases.append(base)
+        for name, address in obj.exports.items():
+            if name in exported:
+                raise ValueError('label defined in more than one object file: ' + name)
+            exported.add(name)
+            #labels after last command of the whole program are never added, same as in first pass
+            if base + address < total:
+                symbols.add_entry(name, base + address)
+        base += len(obj.words)
+        
+    variable = 16
+    linked = array('H')
+    for obj, base in zip(objects, bases):
+        addresses = []
+        for name in obj.imports:
+            if not symbols.contains(name):
+                symbols.add_entry(name, variable)
+                variable += 1
+            addresses.append(symbols.get_address(name) & 0x7FFF)
+            
+        words = array('H', obj.words)
+        for position in obj.relocations:
+            words[position] = (words[position] + base) & 0x7FFF
+        for position, index in obj.fixups:
+            words[position] = addresses[index]
+        linked.extend(words)
+        
+    return linked
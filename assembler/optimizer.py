@@ -0,0 +1,428 @@
+# -*- coding: utf-8 -*-
+
+"""
+Optimizer for a tokenized ir.Program, run between parsing and encoding.
+Peephole rules are safe local rewrites that remove instructions, and dead-code elimination drops
+blocks that cannot be reached from the start. Both work on commands before labels are
+given addresses, so label addresses assigned by the first pass stay correct for the smaller program.
+"""
+
+from array import array
+from assembler import code
+from assembler import ir
+
+D_A = code.c_instruction[('D', 'A', 'null')]
+
+#comp bits, with a-bit, of plain A
+_COPY_A = (code.c_instruction[('null', 'A', 'null')] >> 6) & 0x7F
+
+#A-command value loaded into D by D=A: C-command that sets D to the same constant, and its word
+_constants = {value: ('D=' + str(value), code.c_instruction[('D', str(value), 'null')]) for value in (0, 1)}
+
+#prefix of labels added for numbers jumped to, with a space no symbol in source can have
+JUMP_LABEL = 'ROM '
+
+
+def _writes_a(word):
+    return word & 0b100000
+
+
+def _next_command(kinds, index):
+    """
+    Returns kind of first command after index that is not a label, or None at end of program.
+    """
+
+    for index in range(index + 1, len(kinds)):
+        if kinds[index] != ir.L_COMMAND:
+            return kinds[index]
+    return None
+
+
+def redundant_load(commands, command_words, program):
+    """
+    Drops @X when A already holds X: an earlier @X in the same block, with no label or
+    C-command writing A in between. Jumps not taken leave A unchanged, so they do not end the block.
+    """
+
+    kept = []
+    loaded = None
+    for command in commands:
+        kind, operand, line = command
+        if kind == ir.L_COMMAND:
+            loaded = None
+        elif kind == ir.C_COMMAND:
+            if _writes_a(command_words[operand]):
+                loaded = None
+        elif (kind, operand) == loaded:
+            continue
+        else:
+            loaded = (kind, operand)
+        kept.append(command)
+    return kept
+
+
+def jump_to_next(commands, command_words, program):
+    """
+    Drops @LABEL and a jump with no dest, when (LABEL) is defined right after the jump,
+    since the next instruction runs either way. Only done when the instruction after the label
+    loads A, so nothing relies on A holding LABEL.
+    """
+
+    kinds = [command[0] for command in commands]
+    kept = []
+    index = 0
+    while index < len(commands):
+        kind, operand, line = commands[index]
+        if kind == ir.A_SYMBOL and index + 2 < len(commands) and kinds[index + 1] == ir.C_COMMAND:
+            word = command_words[commands[index + 1][1]]
+            labels = []
+            end = index + 2
+            while end < len(commands) and kinds[end] == ir.L_COMMAND:
+                labels.append(commands[end][1])
+                end += 1
+            if (word & 0b111) and not (word >> 3) & 0b111 and operand in labels and \
+               end < len(commands) and kinds[end] in (ir.A_NUMBER, ir.A_SYMBOL):
+                index += 2
+                continue
+        kept.append(commands[index])
+        index += 1
+    return kept
+
+
+def constant_load(commands, command_words, program):
+    """
+    Rewrites @0 or @1 followed by D=A into D=0 or D=1, when the instruction after them loads A,
+    so nothing relies on the A value that is no longer loaded.
+    """
+
+    kinds = [command[0] for command in commands]
+    kept = []
+    index = 0
+    while index < len(commands):
+        kind, operand, line = commands[index]
+        if kind == ir.A_NUMBER and operand in _constants and index + 1 < len(commands) and \
+           kinds[index + 1] == ir.C_COMMAND and command_words[commands[index + 1][1]] == D_A and \
+           _next_command(kinds, index + 1) in (ir.A_NUMBER, ir.A_SYMBOL):
+            line = commands[index + 1][2]
+            command_id = _command_id(*_constants[operand], command_words, program, line)
+            kept.append((ir.C_COMMAND, command_id, line))
+            index += 2
+            continue
+        kept.append(commands[index])
+        index += 1
+    return kept
+
+
+def _command_id(command, word, command_words, program, line):
+    """
+    Returns command id of C-command spelling, adding it to program with source line of the command it replaces.
+    The spelling is not in content, so command_words is extended with its word, and encoding takes words from there.
+    """
+
+    command_id = program.command_id(command, line)
+    if command_id == len(command_words):
+        command_words.append(word)
+    return command_id
+
+
+#optimizer rules, in the order they are applied
+rules = {
+    'redundant_load': redundant_load,
+    'jump_to_next': jump_to_next,
+    'constant_load': constant_load
+}
+
+
+def optimize(program, command_words):
+    """
+    Applies rules to program in place until none saves more instructions. Command_words lists 16-bit word
+    of each C-command spelling in program.commands, and is extended with spellings rules add.
+    Returns dictionary of rule name to number of instructions saved.
+    """
+
+    commands = list(zip(program.kinds, program.operands, program.lines))
+    saved = dict.fromkeys(rules, 0)
+
+    changed = True
+    while changed:
+        changed = False
+        for rule, apply in rules.items():
+            rewritten = apply(commands, command_words, program)
+            if len(rewritten) < len(commands):
+                saved[rule] += len(commands) - len(rewritten)
+                commands = rewritten
+                changed = True
+
+    _rewrite(program, commands)
+    return saved
+    
+
+def _rewrite(program, commands):
+    program.kinds = array('B', [command[0] for command in commands])
+    program.operands = array('L', [command[1] for command in commands])
+    program.lines = array('L', [command[2] for command in commands])
+
+
+def _reads_a(word):
+    return not word & 0x1000 and not word & 0x200
+
+
+def _reads_d(word):
+    return not word & 0x800
+
+
+def _reads_m(word):
+    return word & 0x1000 and not word & 0x200
+
+
+def _uses_m(word):
+    return word & 0x1000 and not word & 0x200 or word & 0b1000
+
+
+def data_numbers(commands, command_words):
+    """
+    Returns set of values of A-command numbers in commands that a C-command reads as data, such as D=A, while still in A.
+    """
+
+    found = set()
+    for index, (kind, operand, line) in enumerate(commands):
+        if kind != ir.A_NUMBER:
+            continue
+        for next_index in range(index + 1, len(commands)):
+            next_kind, next_operand, next_line = commands[next_index]
+            if next_kind == ir.L_COMMAND:
+                continue
+            if next_kind != ir.C_COMMAND:
+                break
+            word = command_words[next_operand]
+            if _reads_a(word):
+                found.add(operand)
+                break
+            if _writes_a(word) or word & 0b111 == 0b111:
+                break
+    return found
+
+
+def jump_label(name):
+    """
+    Returns True if label name was added by label_jump_numbers(), for an address jumped to as a number.
+    """
+
+    return name.startswith(JUMP_LABEL)
+
+
+def _jumps_indirect(commands, command_words):
+    """
+    Returns True if a jump in commands may go to an address set by a C-command, or held in A from before a label.
+    """
+
+    loaded = False #True if A was last set by an A-command
+    for kind, operand, line in commands:
+        if kind == ir.L_COMMAND:
+            loaded = False
+        elif kind != ir.C_COMMAND:
+            loaded = True
+        else:
+            word = command_words[operand]
+            if word & 0b111 and not loaded:
+                return True
+            if _writes_a(word):
+                loaded = False
+    return False
+
+
+def label_jump_numbers(program, command_words):
+    """
+    Gives each ROM address jumped to through an A-command number a label, defined right before the command there,
+    and loads the label instead of the number, in place. Rules and dead-code elimination then keep jump targets
+    at block starts, and the first pass gives them their address in the smaller program, once.
+    Returns False, leaving program unchanged, if a number jumped to is also used as data or M address,
+    is still in A after a label, or is past the last command, since then it cannot be moved safely.
+    Also returns False if the program jumps to addresses a C-command set, such as return addresses loaded with A=M, 
+    and reads an A-command number below its size as data, since it may be a code address stored for such a jump.
+    """
+
+    commands = list(zip(program.kinds, program.operands, program.lines))
+    count = sum(1 for kind in program.kinds if kind != ir.L_COMMAND)
+    if _jumps_indirect(commands, command_words) and any(value < count for value in data_numbers(commands, command_words)):
+        return False
+    jumps = []
+    for index, (kind, operand, line) in enumerate(commands):
+        if kind != ir.A_NUMBER:
+            continue
+        jumped = used = labelled = False
+        for next_index in range(index + 1, len(commands)):
+            next_kind, next_operand, next_line = commands[next_index]
+            if next_kind == ir.L_COMMAND:
+                labelled = True
+                continue
+            if next_kind != ir.C_COMMAND:
+                break
+            word = command_words[next_operand]
+            used = used or _reads_a(word) or _uses_m(word)
+            if word & 0b111:
+                if labelled:
+                    return False
+                jumped = True
+            if _writes_a(word) or word & 0b111 == 0b111:
+                break
+        if jumped:
+            if used or operand >= count:
+                return False
+            jumps.append(index)
+    if not jumps:
+        return True
+
+    targets = {commands[index][1]: program.name_id(JUMP_LABEL + str(commands[index][1])) for index in jumps}
+    for index in jumps:
+        commands[index] = (ir.A_SYMBOL, targets[commands[index][1]], commands[index][2])
+    labelled = []
+    address = 0
+    for command in commands:
+        if command[0] != ir.L_COMMAND:
+            if address in targets:
+                labelled.append((ir.L_COMMAND, targets[address], command[2]))
+            address += 1
+        labelled.append(command)
+    _rewrite(program, labelled)
+    return True
+
+
+class Block:
+    """
+    Basic block of commands[start : end], starting at labels and ending after a jump or before a label.
+    Labels lists name ids of labels at its start, and references name ids of A-command symbols in it.
+    Falls_through is False if it ends with an unconditional jump. Unfollowable is True if it jumps to a number,
+    see label_jump_numbers(), to a symbol that is not a label, or to an address computed from registers or constants.
+    Indirect is True if it jumps to an address loaded from memory, such as a return address. Tables lists name ids of labels used in arithmetic, such as 
+    A=D+A for a jump table, so any command from the label on may be jumped to.
+    """
+    
+    __slots__ = ('start', 'end', 'labels', 'references', 'falls_through', 'unfollowable', 'indirect', 'tables')
+    
+    def __init__(self, start):
+        self.start = self.end = start
+        self.labels = []
+        self.references = []
+        self.falls_through = True
+        self.unfollowable = False
+        self.indirect = False
+        self.tables = []
+        
+
+def blocks(commands, command_words):
+    """
+    Returns list of Block, splitting commands at labels and after jumps.
+    """
+    
+    labels = {operand for kind, operand, line in commands if kind == ir.L_COMMAND}
+    found = []
+    start = 0
+    while start < len(commands):
+        block = Block(start)
+        end = start
+        while end < len(commands) and commands[end][0] == ir.L_COMMAND:
+            block.labels.append(commands[end][1])
+            end += 1
+            
+        #loaded is index of command that loaded A, if A still holds its value, computed is True if a C-command 
+        #set A from D, A or a constant, not from label arithmetic, and from_memory is True if it set A from M only
+        loaded = None
+        computed = from_memory = False
+        while end < len(commands):
+            kind, operand, line = commands[end]
+            if kind == ir.L_COMMAND:
+                break
+            if kind == ir.A_SYMBOL:
+                block.references.append(operand)
+            if kind != ir.C_COMMAND:
+                loaded = end
+                computed = from_memory = False
+                end += 1
+                continue
+                
+            end += 1
+            word = command_words[operand]
+            table = loaded is not None and commands[loaded][0] == ir.A_SYMBOL and commands[loaded][1] in labels and \
+                    _reads_a(word) and (word >> 6) & 0x7F != _COPY_A
+            if table:
+                block.tables.append(commands[loaded][1])
+            if word & 0b111 and loaded is not None:
+                loaded_kind, loaded_operand, loaded_line = commands[loaded]
+                if loaded_kind == ir.A_NUMBER or loaded_operand not in labels:
+                    block.unfollowable = True
+            elif word & 0b111:
+                block.unfollowable = block.unfollowable or computed
+                block.indirect = block.indirect or from_memory
+            if _writes_a(word):
+                loaded = None
+                from_memory = not table and _reads_m(word) and not _reads_d(word)
+                computed = not table and not from_memory
+            if word & 0b111:
+                block.falls_through = word & 0b111 != 0b111
+                break
+                
+        block.end = end
+        found.append(block)
+        start = end
+    return found
+    
+
+def eliminate_dead_code(program, command_words):
+    """
+    Drops blocks of program that cannot be reached from address 0, in place. A block is reached by running on 
+    from the block before it, or through a label named by an A-command in a reached block. The last covers direct jumps, 
+    and return addresses loaded for jumps through A. Every block from a label used in arithmetic on, such as a jump table, 
+    is reached. Numbers jumped to should be loaded as labels first, with label_jump_numbers(), so the first pass moves them. 
+    Programs that jump to numbers, to symbols that are not labels, or to addresses computed from registers, are left unchanged.
+    So are programs that jump to addresses loaded from memory and read an A-command number below their size as data, 
+    since it may be a return address stored for such a jump.
+    Returns list of removed ranges, each a dictionary of source lines, ROM addresses before removal and labels.
+    """
+    
+    commands = list(zip(program.kinds, program.operands, program.lines))
+    found = blocks(commands, command_words)
+    label_blocks = {label: index for index, block in enumerate(found) for label in block.labels}
+    
+    #ROM address of first command in each block, and of end of program
+    addresses = [0]
+    for block in found:
+        addresses.append(addresses[-1] + sum(1 for command in commands[block.start : block.end] if command[0] != ir.L_COMMAND))
+    numbered = any(value < addresses[-1] for value in data_numbers(commands, command_words))
+    
+    reached = [False] * len(found)
+    pending = [0] if found else []
+    while pending:
+        index = pending.pop()
+        if reached[index]:
+            continue
+        reached[index] = True
+        block = found[index]
+        if block.unfollowable or block.indirect and numbered:
+            return []
+        if block.falls_through and index + 1 < len(found):
+            pending.append(index + 1)
+        pending.extend(label_blocks[name] for name in block.references if name in label_blocks)
+        for name in block.tables:
+            pending.extend(range(label_blocks[name], len(found)))
+        
+    removed = []
+    kept = []
+    for index, block in enumerate(found):
+        address = addresses[index]
+        size = addresses[index + 1] - address
+        if reached[index]:
+            kept.extend(commands[block.start : block.end])
+            continue
+            
+        labels = [program.names[label] for label in block.labels if not jump_label(program.names[label])]
+        if removed and not reached[index - 1]:
+            removed[-1]['lines'][1] = commands[block.end - 1][2]
+            removed[-1]['rom'][1] = address + size - 1
+            removed[-1]['labels'].extend(labels)
+        else:
+            removed.append({'lines': [commands[block.start][2], commands[block.end - 1][2]], 
+                            'rom': [address, address + size - 1], 'labels': labels})
+                            
+    _rewrite(program, kept)
+    return removed
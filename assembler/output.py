@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Renders translated 16-bit words into output file formats: 
+.hack text, raw big-endian or little-endian binary images, and Intel HEX.
+"""
+
+import sys
+from array import array
+from assembler import code
+
+
+def to_binary(words, byteorder='big'):
+    """
+    Returns raw binary image of 16-bit words as bytes, two bytes per word in given byteorder.
+    """
+    
+    image = array('H', words)
+    if byteorder != sys.byteorder:
+        image.byteswap()
+    return image.tobytes()
+    
+
+def _hex_record(address, record_type, data):
+    record = bytes([len(data), address >> 8, address & 0xFF, record_type]) + data
+    return ':' + record.hex().upper() + format(-sum(record) & 0xFF, '02X')
+    
+
+def to_intel_hex(words, byteorder='big', record_size=16):
+    """
+    Returns Intel HEX text of 16-bit words, with byte addresses and record_size data bytes per record.
+    Extended linear address records are added for images larger than 64 KB.
+    """
+    
+    data = to_binary(words, byteorder)
+    lines = []
+    upper = 0
+    
+    for offset in range(0, len(data), record_size):
+        if offset >> 16 != upper:
+            upper = offset >> 16
+            lines.append(_hex_record(0, 4, upper.to_bytes(2, 'big')))
+        lines.append(_hex_record(offset & 0xFFFF, 0, data[offset : offset + record_size]))
+        
+    lines.append(':00000001FF')
+    return '\n'.join(lines) + '\n'
+    
+
+#output format name: (file extension, file mode, render function)
+formats = {
+    'hack': ('.hack', 'w', code.to_text),
+    'bin': ('.bin', 'wb', to_binary),
+    'bin-le': ('.le.bin', 'wb', lambda words: to_binary(words, 'little')),
+    'hex': ('.hex', 'w', to_intel_hex)
+}
+
+
+def write(words, fname, format_name='hack', render=None):
+    """
+    Renders words in named output format and saves them to fname, in one bulk write. 
+    Pass render to use another function for the format, such as vectorized.to_text. No return.
+    """
+    
+    extension, mode, default_render = formats[format_name]
+    render = render or default_render
+    with open(fname, mode) as f:
+        f.write(render(words))
+        
+        
+class Sink:
+    """
+    Writes translated words in named output format to an open stream, such as io.StringIO, io.BytesIO or sys.stdout.
+    Text formats need a text stream and binary formats a binary stream. Pass to api.assemble() as one of its sinks.
+    """
+    
+    def __init__(self, stream, format_name='hack'):
+        self._stream = stream
+        self._render = formats[format_name][2]
+        
+    def __call__(self, words):
+        self._stream.write(self._render(words))
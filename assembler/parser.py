@@ -5,8 +5,19 @@ Parser class to to break each assembly command into
 its underlying components (fields and symbols).
 """
 
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from assembler import code
+from assembler import ir
+from assembler import optimizer
+from assembler import output
+from assembler import pipeline
+from assembler import stats as phase_stats
 from assembler import symbol_table
+from assembler import tokenizer
+from assembler import vectorized as numpy_engine
 
 
 class Parser:
@@ -16,19 +27,61 @@ class Parser:
     
     With auto_run flag set to false, manually run class methods in loop such as open(file.hack, 'w').
     Or set auto_run flag to true to let object instantiation run and save file.hack to data/output/ folder.
+    Set single_pass flag to true to translate in one walk over content, backpatching forward label references.
+    Pass a code.InstructionCache as cache to share c-instruction lookups, and their hit and miss counters, across files.
+    Set formats to a list of output.formats names, such as ['hack', 'bin', 'hex'], to save several formats from one run.
+    Set output_dir to save files there instead of data/output/ folder, and verbose to false to not print saved messages.
+    Set jobs to more than 1 to translate one large file in chunks across that many worker processes.
+    Set mapped flag to true to scan a memory-mapped fname as bytes, without keeping a string per line in memory.
+    Set stats flag to true to time each phase, then call statistics() for timings and counters.
+    Set vectorized flag to true to translate with NumPy in bulk, falling back to two passes if NumPy is not installed.
+    Set optimize flag to true to apply optimizer rules to the tokenized program before labels are given addresses. 
+    Set dead_code flag to true to drop blocks that cannot be reached from the start, before optimizer rules.
+    Optimized programs are translated in two passes, or with NumPy if vectorized flag is set.
+    Set pipelined flag to true to overlap reading blocks of block_size bytes and writing output with encoding, 
+    in stages connected by queues of queue_size blocks, and report their throughput and stalls.
+    Pass content as a list of stripped lines to parse them instead of reading fname, 
+    and symbols as a SymbolTable to start from instead of only predefined symbols.
     """    
     
-    def __init__(self, fname, auto_run=False):
+    def __init__(self, fname, auto_run=False, single_pass=False, cache=None, formats=('hack',), output_dir=None, verbose=True, 
+                 jobs=None, content=None, symbols=None, mapped=False, stats=False, vectorized=False, optimize=False, dead_code=False,
+                 pipelined=False, block_size=1 << 20, queue_size=4):
         self._parsing_file = fname        
-        with open(fname) as f:
-            self._content = [line.strip() for line in f.readlines()]
+        self._single_pass = single_pass
+        self._formats = formats
+        self._output_dir = output_dir
+        self._verbose = verbose
+        self._jobs = jobs
+        self._mapped = mapped
+        self._vectorized = vectorized and numpy_engine.available
+        self._optimize = optimize or dead_code
+        self._peephole = optimize
+        self._dead_code = dead_code
+        self._optimizations = None #dictionary of optimizer rule to instructions saved, see tokenize()
+        self._removed = None #list of ranges removed as dead code, see tokenize()
+        self._command_words = None #word of each C-command spelling of optimized program, see tokenize()
+        self._pipelined = pipelined
+        self._block_size = block_size
+        self._queue_size = queue_size
+        self._pipeline = None #pipeline.Pipeline with stage and queue stats, see run_pipelined()
+        self._stats = phase_stats.Stats(enabled=stats)
+        with self._stats.phase('read'):
+            if content is None and (mapped or pipelined) and not self._optimize:
+                content = []
+            elif content is None:
+                with open(fname) as f:
+                    content = [line.strip() for line in f.readlines()]
+        self._content = content
             
         self._current_command = 0 #index for opened content               
         self._next_command = 0        
-        self._symbols = symbol_table.SymbolTable()
+        self._symbols = symbols if symbols is not None else symbol_table.SymbolTable()
         self._variable_symbols = 16
         self._next_translated_command = 0 #next index for translated text
-        self._translation = '' 
+        self._translation = array('H') #16-bit words of translated text
+        self._cache = cache if cache is not None else code.InstructionCache()
+        self._program = None #compact intermediate representation, see tokenize()
 
         #this runs if auto_run flag is set to True
         if auto_run:
@@ -52,7 +105,7 @@ class Parser:
         
         #if current command has already run once, then increment by 1  
         start = 0
-        if self._current_command:
+        if self._next_translated_command:
             start = self._current_command + 1
         end = len(self._content)  
         
@@ -152,49 +205,478 @@ class Parser:
         else:
             return 'null'
             
-    def translate(self):
-        if self.command_type() == 'A_COMMAND':
-            value = self.symbol()
-            
-            #number variables
-            if value.isdigit():
-                address = int(value) 
+    def resolve(self, value):
+        """
+        Returns address for the symbol or decimal Xxx of an A-command @Xxx. 
+        Symbols not found in symbol table are added as new variables, starting at address 16.
+        """
+        
+        #number variables
+        if value.isdigit():
+            return int(value) 
+        
+        #symbol variables            
+        if self._symbols.contains(value):
+            return self._symbols.get_address(value)   
+        
+        #new symbol variables - start adding these at address 16            
+        address = self._variable_symbols
+        self._symbols.add_entry(value, self._variable_symbols)
+        self._variable_symbols += 1
+        return address
             
-            #symbol variables            
-            elif self._symbols.contains(value):
-                address = self._symbols.get_address(value)   
+    def encode(self):
+        """
+        Returns 16-bit word of current command as an integer. 
+        C-commands are looked up in instruction cache, then in table of all valid c-instructions.
+        """
+        
+        if self.command_type() == 'A_COMMAND':
+            return self.resolve(self.symbol()) & 0x7FFF
             
-            #new symbol variables - start adding these at address 16            
-            else:
-                address = self._variable_symbols
-                self._symbols.add_entry(value, self._variable_symbols)
-                self._variable_symbols += 1
-                
-            binary = '0' + bin(((1 << 15) - 1) & address)[2:].zfill(15)
+        #same c-instruction text is usually repeated many times, so look it up in cache first
+        command = self._content[self._current_command]
+        word = self._cache.get(command)
+        if word is None:
+            word = code.c_instruction[(self.dest(), self.comp(), self.jump())]
+            self._cache.put(command, word)
+        return word
             
-        else:
-            binary = '111' + code.comp[self.comp()] + code.dest[self.dest()] + code.jump[self.jump()]       
+    def translate(self):
+        """
+        Returns binary code of current command as a 16 character string.
+        """
+        
+        return format(self.encode(), '016b')
+        
+    def tokenize(self):
+        """
+        Returns content as a compact ir.Program, tokenizing it on first call. Both passes work on it.
+        If dead_code or optimize flags are set, numbers jumped to are loaded as labels, then unreachable blocks are dropped, 
+        then optimizer rules applied, once tokenized. Programs whose numbers jumped to cannot be moved are left unchanged.
+        """
         
-        return binary
+        if self._program is None:
+            with self._stats.phase('tokenize'):
+                program = ir.tokenize(self._content)
+            if self._optimize:
+                command_words = self._command_words = self.encode_spellings(program)
+                movable = optimizer.label_jump_numbers(program, command_words)
+                if self._dead_code:
+                    with self._stats.phase('dead_code'):
+                        self._removed = optimizer.eliminate_dead_code(program, command_words) if movable else []
+                if self._peephole:
+                    with self._stats.phase('optimize'):
+                        self._optimizations = optimizer.optimize(program, command_words) if movable else dict.fromkeys(optimizer.rules, 0)
+            self._program = program
+        return self._program
+        
+    def encode_spellings(self, program):
+        """
+        Returns list of 16-bit words, one for each distinct C-command spelling in program.commands.
+        Words of an optimized program are kept from tokenize(), since optimizer rules add spellings not in content.
+        """
+        
+        if program is self._program and self._command_words is not None:
+            return self._command_words
+        words = []
+        for line in program.commands:
+            self._current_command = line
+            words.append(self.encode())
+        return words
         
     def run_first_pass(self):
-        while self.has_more_commands():
-            self.advance()
+        program = self.tokenize()
+        with self._stats.phase('first_pass'):
+            labels_found = []
+            count = 0
+            for kind, operand in zip(program.kinds, program.operands):
+                if kind == ir.L_COMMAND:
+                    labels_found.append(operand)
+                    continue
+                    
+                #labels point to next command
+                if labels_found:
+                    for label in labels_found:
+                        self._symbols.add_entry(program.names[label], count)
+                    labels_found = []
+                count += 1
             
         #reset command lines for opened content and translated text    
         self._current_command = 0                
         self._next_command = 0
         self._next_translated_command = 0        
 
+    def translation_file(self, extension='.hack'):
+        """
+        Returns path of file.hack, or file with other extension, in data/output/ folder for file.asm in data/input/ folder.
+        If output_dir was set, returns path in that folder instead.
+        """
+        
+        name = os.path.splitext(self._parsing_file)[0]
+        if self._output_dir is not None:
+            return os.path.join(self._output_dir, os.path.basename(name) + extension)
+        return name.replace('input','output') + extension
+
+    def output_files(self):
+        """
+        Returns dictionary of output format name to path of file to save, for each output format.
+        """
+        
+        return {format_name: self.translation_file(output.formats[format_name][0]) for format_name in self._formats}
+
+    def write(self):
+        """
+        Writes translated words to data/output/ folder in each output format, one bulk write per file. 
+        Returns list of saved file paths.
+        """
+        
+        saved = []
+        with self._stats.phase('write'):
+            for format_name, translation_file in self.output_files().items():
+                render = numpy_engine.to_text if self._vectorized and format_name == 'hack' else None
+                output.write(self._translation, translation_file, format_name, render)
+                saved.append(translation_file)
+        return saved
+        
+    def report(self, saved):
+        """
+        Prints a saved message for each file path in saved, if verbose flag is set to True. No return.
+        """
+        
+        if not self._verbose:
+            return
+        if self._removed is not None:
+            print('\nRemoved ' + str(sum(end - start + 1 for start, end in (removed['rom'] for removed in self._removed))) + 
+                  ' unreachable instructions in ' + str(len(self._removed)) + ' ranges')
+            for removed in self._removed:
+                labels = removed['labels'][:1] + (['and ' + str(len(removed['labels']) - 1) + ' more labels'] if len(removed['labels']) > 1 else [])
+                print('  lines ' + '-'.join(str(line + 1) for line in removed['lines']) + 
+                      ', ROM ' + '-'.join(map(str, removed['rom'])) + (': ' + ' '.join(labels) if labels else ''))
+        if self._pipeline is not None:
+            print('\n' + self._pipeline.summary(), end='')
+        if self._optimizations is not None:
+            print('\nOptimizer saved ' + str(sum(self._optimizations.values())) + ' instructions: ' + 
+                  ', '.join(rule + ' ' + str(count) for rule, count in self._optimizations.items()))
+        for translation_file in saved:
+            folder, name = os.path.split(translation_file)
+            print('\n' + name + ' translation file saved to folder at ' + folder + '/')                
+
+    def encode_commands(self):
+        """
+        Encodes all remaining commands, without adding labels to symbol table, and returns array of translated words.
+        """
+        
+        while self.has_more_commands(first_pass=False):
+            self.advance()
+            self._translation.append(self.encode())
+        return self._translation
+
+    def encode_program(self):
+        """
+        Encodes all commands of tokenized program, without adding labels to symbol table, and returns array of translated words.
+        Each distinct symbol is resolved, and each distinct C-command spelling encoded, only once.
+        """
+        
+        program = self.tokenize()
+        addresses = [None] * len(program.names)
+        words = self._command_words or [None] * len(program.commands)
+        translation = self._translation
+        
+        for kind, operand in zip(program.kinds, program.operands):
+            if kind == ir.A_NUMBER:
+                translation.append(operand)
+                
+            elif kind == ir.A_SYMBOL:
+                address = addresses[operand]
+                if address is None:
+                    address = addresses[operand] = self.resolve(program.names[operand]) & 0x7FFF
+                translation.append(address)
+                
+            elif kind == ir.C_COMMAND:
+                word = words[operand]
+                if word is None:
+                    self._current_command = program.commands[operand]
+                    word = words[operand] = self.encode()
+                translation.append(word)
+                
+        return translation
+
     def run_second_pass(self):       
-        translation_file = self._parsing_file.split('.')[0].replace('input','output') + '.hack'
-        with open(translation_file, 'w') as f:
-            while self.has_more_commands(first_pass=False):
-                self.advance()
-                f.write(self.translate() + '\n')   
+        with self._stats.phase('second_pass'):
+            self.encode_program()
+        self.report(self.write())
+        
+    def run_single_pass(self):
+        """
+        Translates tokenized program in one walk, emitting code as it goes. A-commands with symbols 
+        not yet in symbol table are recorded in a fixup list and patched once all labels are known, 
+        so new variables are still allocated in order of first appearance.
+        """
+        
+        program = self.tokenize()
+        with self._stats.phase('single_pass'):
+            names = program.names
+            command_words = self.encode_spellings(program)
+            symbols = self._symbols
+            addresses = [None] * len(names) #address of each name known so far, or -1 if not in symbol table
+            translation = self._translation
+            fixups = []
+            labels_found = []
+        
+            for kind, operand in zip(program.kinds, program.operands):
+                if kind == ir.L_COMMAND:
+                    labels_found.append(operand)
+                    continue
+            
+                #labels point to next command, same as in first pass 
+                if labels_found:
+                    for label in labels_found: 
+                        symbols.add_entry(names[label], len(translation))
+                        addresses[label] = len(translation) & 0x7FFF
+                    labels_found = []
+            
+                if kind == ir.A_NUMBER:
+                    translation.append(operand)
+                elif kind == ir.C_COMMAND:
+                    translation.append(command_words[operand])
+                else:
+                    #only a label defined later can add a name missing now, and it sets its address
+                    address = addresses[operand]
+                    if address is None:
+                        name = names[operand]
+                        address = addresses[operand] = symbols.get_address(name) & 0x7FFF if symbols.contains(name) else -1
+                    if address < 0:
+                        fixups.append((len(translation), operand))
+                        address = 0
+                    translation.append(address)
+            
+            #backpatch forward label references, and allocate variables for the rest
+            addresses = [None] * len(names)
+            for position, operand in fixups:
+                address = addresses[operand]
+                if address is None:
+                    address = addresses[operand] = self.resolve(names[operand]) & 0x7FFF
+                translation[position] = address
+        
+        self.report(self.write())
+        
+    def run_parallel(self, jobs=None, chunk_lines=None):
+        """
+        Translates content in chunks of chunk_lines lines across jobs worker processes. 
+        Chunks are scanned in parallel for instruction counts, labels and symbols. Label addresses are then 
+        resolved with a prefix sum over chunk counts, and variables are allocated in order of first appearance. 
+        Finally chunks are encoded in parallel and concatenated, matching output of two passes bit for bit.
+        """
+        
+        with self._stats.phase('parallel'):
+            jobs = jobs or self._jobs or os.cpu_count()
+            if chunk_lines is None:
+                chunk_lines = max(4096, -(-len(self._content) // (jobs * 4)))
+            chunks = [self._content[start : start + chunk_lines] for start in range(0, len(self._content), chunk_lines)]
+        
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                scans = list(executor.map(scan_chunk, chunks))
+            
+                #labels after last command are never added, same as in first pass
+                total = sum(scan[0] for scan in scans)
+                base = 0
+                for count, labels, values in scans:
+                    for label, offset in labels:
+                        if base + offset < total:
+                            self._symbols.add_entry(label, base + offset)
+                    base += count
                 
-        print('\n' + translation_file.split('/')[-1] + ' translation file saved to folder at data/output/')                
+                for count, labels, values in scans:
+                    for value in values:
+                        self.resolve(value)
+            
+                #each chunk is sent only addresses of symbols it references, not the whole symbol table
+                addresses = [{value: self._symbols.get_address(value) for value in values} for count, labels, values in scans]
+                for words in executor.map(encode_chunk, chunks, addresses):
+                    self._translation.extend(words)
+                
+        self.report(self.write())
+        
+    def run_mapped(self):
+        """
+        Translates a memory-mapped fname in two scans over its bytes, one for labels and one for encoding. 
+        Only distinct symbols and C-command spellings are decoded into strings.
+        """
+        
+        with self._stats.phase('mapped'), tokenizer.mapped(self._parsing_file) as data:
+            labels_found = []
+            count = 0
+            for kind, value in tokenizer.tokenize(data):
+                if kind == tokenizer.L_COMMAND:
+                    labels_found.append(value)
+                    continue
+                for label in labels_found:
+                    self._symbols.add_entry(label.strip().decode(), count)
+                labels_found = []
+                count += 1
+                
+            addresses = {}
+            translation = self._translation
+            for kind, value in tokenizer.tokenize(data):
+                if kind == tokenizer.A_COMMAND:
+                    address = addresses.get(value)
+                    if address is None:
+                        address = addresses[value] = self.resolve(value.decode()) & 0x7FFF
+                    translation.append(address)
+                    
+                elif kind == tokenizer.C_COMMAND:
+                    word = self._cache.get(value)
+                    if word is None:
+                        word = tokenizer.c_word(value)
+                        self._cache.put(value, word)
+                    translation.append(word)
+                    
+        self.report(self.write())
+        
+    def run_vectorized(self):
+        """
+        Translates tokenized program with NumPy: labels, symbols and C-command words are resolved in bulk 
+        and gathered into one array. Falls back to run_first_pass() and run_second_pass() if NumPy is not installed.
+        """
+        
+        if not numpy_engine.available:
+            self.run_first_pass()
+            self.run_second_pass()
+            return
+            
+        program = self.tokenize()
+        with self._stats.phase('vectorized'):
+            command_words = self.encode_spellings(program)
+            self._translation = numpy_engine.translate(program, self._symbols, self.resolve, command_words)
+            
+        self.report(self.write())
+        
+    def run_pipelined(self):
+        """
+        Translates fname in reader, encoder and writer stages running at the same time, see pipeline.Pipeline. 
+        Words are written to each output file a chunk at a time once labels are known, instead of in one bulk write.
+        """
+        
+        saved = self.output_files()
+        with self._stats.phase('pipelined'):
+            self._pipeline = pipeline.Pipeline(self._parsing_file, saved, partial(encode_region, cache=self._cache), 
+                                               self._block_size, self._queue_size, words=self._translation)
+            self._pipeline.run()
+        self._variable_symbols = 16 + self._pipeline.variables
+        self.report(list(saved.values()))
         
     def run(self):
-        self.run_first_pass()
-        self.run_second_pass()        
\ No newline at end of file
+        if self._mapped and not self._optimize:
+            self.run_mapped()
+        elif self._pipelined and not self._optimize:
+            self.run_pipelined()
+        elif self._vectorized:
+            self.run_vectorized()
+        elif self._optimize:
+            self.run_first_pass()
+            self.run_second_pass()
+        elif self._jobs and self._jobs > 1:
+            self.run_parallel()
+        elif self._single_pass:
+            self.run_single_pass()
+        else:
+            self.run_first_pass()
+            self.run_second_pass()
+            
+    def statistics(self):
+        """
+        Returns dictionary of seconds per phase, if stats flag was set, and counts of lines, comments, labels, 
+        variables, A- and C-commands, and instruction cache lookups. Counts of lines are only made when called.
+        """
+        
+        if self._mapped or self._pipelined:
+            with tokenizer.mapped(self._parsing_file) as data:
+                counts = tokenizer.count_lines(data)
+        else:
+            counts = {
+                'lines': len(self._content),
+                'blank': sum(1 for line in self._content if not line),
+                'comments': sum(1 for line in self._content if line.startswith('//')),
+                'labels': sum(1 for line in self._content if line.startswith('('))
+            }
+            
+        c_commands = sum(word >> 15 for word in self._translation)
+        counts.update({
+            'variables': self._variable_symbols - 16,
+            'a_commands': len(self._translation) - c_commands,
+            'c_commands': c_commands,
+            'cache': self._cache.info()
+        })
+        if self._optimizations is not None:
+            counts['optimizer'] = self._optimizations
+        if self._removed is not None:
+            counts['dead_code'] = self._removed
+        if self._pipeline is not None:
+            counts['pipeline'] = self._pipeline.stats()
+        return {'file': self._parsing_file, 'phases': dict(self._stats.phases), 'counts': counts}
+
+
+def scan_chunk(lines):
+    """
+    Scans a chunk of stripped lines in a worker process. Returns (count, labels, values): number of commands, 
+    list of (label, command offset in chunk) and list of A-command symbols in order of first appearance.
+    """
+    
+    program = ir.tokenize(lines)
+    names = program.names
+    count = 0
+    labels = []
+    values = {}
+    
+    for kind, operand in zip(program.kinds, program.operands):
+        if kind == ir.L_COMMAND:
+            labels.append((names[operand], count))
+            continue
+        if kind == ir.A_SYMBOL:
+            values.setdefault(names[operand])
+        count += 1
+        
+    return count, labels, list(values)
+    
+
+def encode_chunk(lines, addresses):
+    """
+    Encodes a chunk of stripped lines in a worker process, with addresses as a dictionary of each label and variable
+    referenced in it to its address. Returns array of translated words.
+    """
+    
+    symbols = symbol_table.SymbolTable()
+    for name, address in addresses.items():
+        symbols.add_entry(name, address)
+    return Parser('<chunk>', content=lines, symbols=symbols).encode_program()
+
+
+def encode_region(lines, cache=None):
+    """
+    Encodes a region of stripped lines, such as a run of label blocks, with 0 in place of each symbol, to be linked later. 
+    Returns (words, labels, offsets, symbols):
+    translated words, list of (label, ROM offset) in order, and ROM offset and name of each A-command symbol.
+    """
+
+    p = Parser('<region>', content=lines, cache=cache)
+    program = p.tokenize()
+    command_words = p.encode_spellings(program)
+    names = program.names
+    words = array('H')
+    labels = []
+    offsets = array('L')
+    symbols = []
+
+    for kind, operand in zip(program.kinds, program.operands):
+        if kind == ir.A_NUMBER:
+            words.append(operand)
+        elif kind == ir.C_COMMAND:
+            words.append(command_words[operand])
+        elif kind == ir.A_SYMBOL:
+            offsets.append(len(words))
+            symbols.append(names[operand])
+            words.append(0)
+        else:
+            labels.append((names[operand], len(words)))
+    return words, labels, offsets, symbols
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+
+"""
+Pipelined translation: reader, encoder and writer stages connected by bounded queues. Reading blocks of the input file
+overlaps with encoding them, and writing translated chunks overlaps with linking and rendering later ones, since 
+no symbol word is known before all labels are. Reader and writer run in threads, and wait on file I/O with the GIL released. 
+Each stage records its busy time and throughput, and each queue the times a stage stalled on it, 
+full for its producer or empty for its consumer, to tune block and queue sizes.
+"""
+
+import os
+import queue
+import threading
+import time
+from array import array
+from assembler import output
+from assembler.symbol_table import SymbolTable
+
+_end = None #sentinel put on a queue after last item
+
+
+class Channel:
+    """
+    Bounded queue between two stages. Counts puts that found it full and gets that found it empty,
+    and seconds its producer and consumer spent blocked on them.
+    """
+
+    def __init__(self, maxsize):
+        self._queue = queue.Queue(maxsize)
+        self.full = 0
+        self.empty = 0
+        self.full_seconds = 0.0
+        self.empty_seconds = 0.0
+
+    def put(self, item):
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.full += 1
+            start = time.perf_counter()
+            self._queue.put(item)
+            self.full_seconds += time.perf_counter() - start
+
+    def get(self):
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            self.empty += 1
+            start = time.perf_counter()
+            item = self._queue.get()
+            self.empty_seconds += time.perf_counter() - start
+            return item
+
+    def stats(self):
+        return {'full': self.full, 'empty': self.empty, 'full_seconds': self.full_seconds, 'empty_seconds': self.empty_seconds}
+
+
+class Pipeline:
+    """
+    Translates fname and saves it to files, a dictionary of output format name to path, through three stages.
+    The reader reads block_size bytes at a time and passes whole lines on. The encoder encodes each block with 
+    encode_region, such as parser.encode_region, leaving symbols as 0, and once input ends links them and 
+    puts chunks of chunk_words words on. The writer renders each chunk to every output file.
+    Queues hold up to queue_size blocks or chunks. Intel HEX needs one end record for the whole image,
+    so its words are collected and written when input ends. Pass words as an array('H') to also collect translated words in it.
+    """
+
+    def __init__(self, fname, files, encode_region, block_size=1 << 20, queue_size=4, chunk_words=None, words=None):
+        self._fname = fname
+        self._files = files
+        self._block_size = block_size
+        self._chunk_words = chunk_words or max(1, block_size // 16)
+        self._encode_region = encode_region
+        self._lines = Channel(queue_size)
+        self._chunks = Channel(queue_size)
+        self._failed = threading.Event()
+        self._errors = []
+        self._words = words
+        self.stages = {
+            'read': {'seconds': 0.0, 'bytes': 0},
+            'encode': {'seconds': 0.0, 'lines': 0, 'words': 0},
+            'write': {'seconds': 0.0, 'bytes': 0}
+        }
+        self.variables = 0
+
+    def read(self):
+        """
+        Reader stage: puts blocks of whole lines, as bytes, on lines queue. No return.
+        """
+
+        stage = self.stages['read']
+        start = time.perf_counter()
+        try:
+            rest = b''
+            with open(self._fname, 'rb') as f:
+                while not self._failed.is_set():
+                    data = f.read(self._block_size)
+                    if not data:
+                        break
+                    stage['bytes'] += len(data)
+                    cut = data.rfind(b'\n') + 1
+                    if not cut:
+                        rest += data
+                        continue
+                    self._lines.put(rest + data[:cut])
+                    rest = data[cut:]
+            if rest:
+                self._lines.put(rest)
+        except Exception as error:
+            self._fail(error)
+        finally:
+            self._lines.put(_end)
+            stage['seconds'] = time.perf_counter() - start - self._lines.full_seconds
+
+    def encode(self):
+        """
+        Encoder stage: encodes blocks from lines queue, then links symbols and puts chunks of words on chunks queue. No return.
+        """
+
+        stage = self.stages['encode']
+        start = time.perf_counter()
+        data = b''
+        try:
+            words = array('H')
+            labels = []
+            references = array('L')
+            symbols = []
+            while True:
+                data = self._lines.get()
+                if data is _end:
+                    break
+                lines = [line.strip() for line in data.decode().splitlines()]
+                stage['lines'] += len(lines)
+                block_words, block_labels, offsets, block_symbols = self._encode_region(lines)
+                base = len(words)
+                words.extend(block_words)
+                labels.extend((label, base + offset) for label, offset in block_labels)
+                references.extend(base + offset for offset in offsets)
+                symbols.extend(block_symbols)
+
+            #labels after last command are never added, same as in first pass
+            table = SymbolTable()
+            for label, address in labels:
+                if address < len(words):
+                    table.add_entry(label, address)
+            addresses = {}
+            for name in symbols:
+                if name not in addresses:
+                    if not table.contains(name):
+                        table.add_entry(name, 16 + self.variables)
+                        self.variables += 1
+                    addresses[name] = table.get_address(name) & 0x7FFF
+
+            #symbols are patched a chunk at a time, so the writer can start on the first chunk
+            index = 0
+            for chunk_start in range(0, len(words), self._chunk_words):
+                chunk_end = min(chunk_start + self._chunk_words, len(words))
+                while index < len(references) and references[index] < chunk_end:
+                    words[references[index]] = addresses[symbols[index]]
+                    index += 1
+                self._chunks.put(words[chunk_start : chunk_end])
+            stage['words'] = len(words)
+        except Exception as error:
+            self._fail(error)
+            while data is not _end:
+                data = self._lines.get()
+        finally:
+            self._chunks.put(_end)
+            stage['seconds'] = time.perf_counter() - start - self._lines.empty_seconds - self._chunks.full_seconds
+
+    def write(self):
+        """
+        Writer stage: renders chunks from chunks queue to each output file. No return.
+        """
+
+        stage = self.stages['write']
+        start = time.perf_counter()
+        streams = {}
+        image = array('H')
+        words = ()
+        try:
+            for format_name, fname in self._files.items():
+                streams[format_name] = open(fname, output.formats[format_name][1])
+            while True:
+                words = self._chunks.get()
+                if words is _end:
+                    break
+                if self._failed.is_set():
+                    continue
+                if self._words is not None:
+                    self._words.extend(words)
+                for format_name, stream in streams.items():
+                    if format_name == 'hex':
+                        image.extend(words)
+                        continue
+                    data = output.formats[format_name][2](words)
+                    stage['bytes'] += len(data)
+                    stream.write(data)
+            if 'hex' in streams and not self._failed.is_set():
+                data = output.to_intel_hex(image)
+                stage['bytes'] += len(data)
+                streams['hex'].write(data)
+        except Exception as error:
+            self._fail(error)
+            while words is not _end:
+                words = self._chunks.get()
+        finally:
+            for stream in streams.values():
+                stream.close()
+            stage['seconds'] = time.perf_counter() - start - self._chunks.empty_seconds
+
+    def _fail(self, error):
+        self._errors.append(error)
+        self._failed.set()
+
+    def run(self):
+        """
+        Runs stages until input ends. Returns number of words translated. If any stage raises, partly written
+        output files are removed, and its exception raised again once all stages have stopped.
+        """
+
+        threads = [threading.Thread(target=self.read), threading.Thread(target=self.write)]
+        for thread in threads:
+            thread.start()
+        self.encode()
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            for fname in self._files.values():
+                if os.path.exists(fname):
+                    os.remove(fname)
+            raise self._errors[0]
+        return self.stages['encode']['words']
+
+    def stats(self):
+        """
+        Returns dictionary of stages, each with busy seconds and amount processed, and of queues with their stalls.
+        """
+
+        return {'stages': self.stages, 'queues': {'lines': self._lines.stats(), 'chunks': self._chunks.stats()}}
+
+    def summary(self):
+        """
+        Returns text with throughput of each stage over its busy seconds, and stalls on each queue.
+        """
+
+        def rate(amount, seconds, unit):
+            return format(amount / seconds if seconds > 0 else 0.0, '.1f') + ' ' + unit + '/s'
+
+        stages = self.stages
+        text = 'Pipeline read ' + rate(stages['read']['bytes'] / 1e6, stages['read']['seconds'], 'MB') + \
+               ', encode ' + rate(stages['encode']['lines'] / 1e6, stages['encode']['seconds'], 'M lines') + \
+               ', write ' + rate(stages['write']['bytes'] / 1e6, stages['write']['seconds'], 'MB') + '\n'
+        for name, channel in (('lines', self._lines), ('chunks', self._chunks)):
+            text += '  ' + name + ' queue: full ' + str(channel.full) + ' times (' + format(channel.full_seconds, '.3f') + \
+                    ' s), empty ' + str(channel.empty) + ' times (' + format(channel.empty_seconds, '.3f') + ' s)\n'
+        return text
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Server to translate many small programs in one long-running process. Requests and responses are JSON lines, 
+read from stdin and written to stdout, or exchanged over a local Unix socket.
+
+Request: {"id": 1, "source": "@2\nD=A\n", "format": "hack"}, where format is one of output.formats or "words". 
+Binary formats are returned base64 encoded. 
+Response: {"id": 1, "ok": true, "output": "...", "latency_ms": 0.8, "queue_depth": 0}, 
+or {"id": 1, "ok": false, "error": "...", ...} if request failed.
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from assembler import api
+from assembler import code
+from assembler import output
+
+#kept warm in each worker process, along with code tables and predefined symbols
+_cache = code.InstructionCache()
+
+
+def assemble_request(source, format_name='hack'):
+    """
+    Translates source in a worker process and returns output in format_name: 
+    text for text formats, base64 text for binary formats, or list of integers for 'words'.
+    """
+    
+    words = api.assemble(source, cache=_cache)
+    if format_name == 'words':
+        return list(words)
+    rendered = output.formats[format_name][2](words)
+    if isinstance(rendered, bytes):
+        return base64.b64encode(rendered).decode()
+    return rendered
+    
+
+class Server:
+    """
+    Handles JSON-line requests concurrently with asyncio, translating them across a pool of jobs worker processes.
+    Counts requests in flight, reported with each response as queue_depth when the request arrived.
+    """
+    
+    def __init__(self, jobs=None):
+        self._executor = ProcessPoolExecutor(max_workers=jobs)
+        self.pending = 0
+        self.served = 0
+        
+    def close(self):
+        self._executor.shutdown()
+        
+    async def handle(self, line):
+        """
+        Returns response dictionary for one JSON request line.
+        """
+        
+        start = time.perf_counter()
+        depth = self.pending
+        self.pending += 1
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._executor, assemble_request, request['source'], request.get('format', 'hack'))
+            response = {'id': request_id, 'ok': True, 'output': result}
+        except Exception as e:
+            response = {'id': request_id, 'ok': False, 'error': type(e).__name__ + ': ' + str(e)}
+        finally:
+            self.pending -= 1
+            self.served += 1
+            
+        response['latency_ms'] = (time.perf_counter() - start) * 1000
+        response['queue_depth'] = depth
+        return response
+        
+    async def serve(self, readline, write):
+        """
+        Reads request lines with coroutine readline until it returns empty bytes, and writes each response 
+        line with write as soon as it is ready, so responses may come back in a different order.
+        """
+        
+        tasks = set()
+        
+        async def respond(line):
+            write((json.dumps(await self.handle(line)) + '\n').encode())
+            
+        while True:
+            line = await readline()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.ensure_future(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                
+        if tasks:
+            await asyncio.gather(*tasks)
+            
+    async def serve_stdio(self):
+        """
+        Serves requests from stdin, with responses to stdout, until end of input.
+        """
+        
+        loop = asyncio.get_running_loop()
+        
+        async def readline():
+            return await loop.run_in_executor(None, sys.stdin.buffer.readline)
+            
+        def write(data):
+            sys.stdout.buffer.write(data)
+            sys.stdout.buffer.flush()
+            
+        await self.serve(readline, write)
+        
+    async def serve_socket(self, path):
+        """
+        Serves requests over a Unix socket at path, one serve() per connection, until cancelled.
+        """
+        
+        async def connection(reader, writer):
+            try:
+                await self.serve(reader.readline, writer.write)
+                await writer.drain()
+            finally:
+                writer.close()
+                
+        if os.path.exists(path):
+            os.remove(path)
+        server = await asyncio.start_unix_server(connection, path)
+        async with server:
+            await server.serve_forever()
+            
+
+def run(jobs=None, socket_path=None):
+    """
+    Runs server on stdin and stdout, or on Unix socket at socket_path if given. No return.
+    """
+    
+    server = Server(jobs)
+    try:
+        if socket_path is None:
+            asyncio.run(server.serve_stdio())
+        else:
+            asyncio.run(server.serve_socket(socket_path))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
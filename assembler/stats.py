@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Stats class to time phases of a translation, such as read, first pass, second pass and write.
+When disabled, timing a phase costs one attribute check, so hooks can stay in place.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+
+_disabled = nullcontext()
+
+
+class Stats:
+    """
+    Records seconds spent in each named phase, summed over repeated phases.
+    """
+    
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.phases = {}
+        
+    def phase(self, name):
+        """
+        Returns context manager that adds time spent inside it to phase name, or does nothing if disabled.
+        """
+        
+        if not self.enabled:
+            return _disabled
+        return self._timed(name)
+        
+    @contextmanager
+    def _timed(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+"""
+StreamAssembler class to translate assembly lines as they arrive, such as from stdin in a Unix pipe,
+and write translated words to an output stream as soon as they are resolved.
+Words with forward references are buffered until their label is defined, or until input ends for variables,
+so memory is bounded by words waiting on a reference rather than by program size.
+"""
+
+import sys
+from array import array
+from collections import deque
+from assembler import code
+from assembler import output
+from assembler import symbol_table
+from assembler import tokenizer
+
+#output formats that can be written in chunks; Intel HEX needs one end record for whole image
+formats = ('hack', 'bin', 'bin-le')
+
+
+class StreamAssembler:
+    """
+    Accepts assembly lines one at a time with feed(), and writes translated words through sink,
+    a callable such as output.Sink, in chunks of at least chunk_words words. Call close() when input ends,
+    to allocate variables and write remaining words. Translated words match a two-pass translation.
+    """
+
+    def __init__(self, sink, chunk_words=4096, cache=None):
+        self._sink = sink
+        self._chunk_words = chunk_words
+        self._cache = cache if cache is not None else code.InstructionCache()
+        self._symbols = symbol_table.SymbolTable()
+        self._buffer = array('H') #words from ROM address self._written on, not yet written
+        self._written = 0
+        self._references = {} #unresolved symbol: list of ROM addresses using it, in order of first appearance
+        self._waiting = deque() #(ROM address, symbol) of words using symbols unresolved when fed, in order
+
+    @property
+    def address(self):
+        """
+        ROM address of next command.
+        """
+
+        return self._written + len(self._buffer)
+
+    def feed(self, line):
+        """
+        Translates one line of assembly, buffering its word, and writes resolved words once a chunk is ready. No return.
+        """
+
+        line = line.split('//')[0].strip()
+        if not line:
+            return
+
+        if line[0] == '(':
+            label = line[1 : line.find(')')].strip()
+            self._symbols.add_entry(label, self.address)
+            for address in self._references.pop(label, ()):
+                self._buffer[address - self._written] = self.address & 0x7FFF
+
+        elif line[0] == '@':
+            value = line[1:].split(' ')[0]
+            if value.isdigit():
+                self._buffer.append(int(value) & 0x7FFF)
+            elif self._symbols.contains(value):
+                self._buffer.append(self._symbols.get_address(value) & 0x7FFF)
+            else:
+                self._references.setdefault(value, []).append(self.address)
+                self._waiting.append((self.address, value))
+                self._buffer.append(0)
+
+        else:
+            word = self._cache.get(line)
+            if word is None:
+                word = tokenizer.c_word(line.encode())
+                self._cache.put(line, word)
+            self._buffer.append(word)
+
+        self.flush(self._chunk_words)
+
+    def resolved(self):
+        """
+        Returns number of buffered words with no unresolved reference before or in them.
+        """
+
+        waiting = self._waiting
+        while waiting and waiting[0][1] not in self._references:
+            waiting.popleft()
+        return (waiting[0][0] if waiting else self.address) - self._written
+
+    def flush(self, minimum=1):
+        """
+        Writes resolved words, if there are at least minimum of them. Returns number of words written.
+        """
+
+        count = self.resolved()
+        if count < max(minimum, 1):
+            return 0
+        self._sink(self._buffer[:count])
+        del self._buffer[:count]
+        self._written += count
+        return count
+
+    def close(self):
+        """
+        Allocates symbols still unresolved as variables, from address 16 in order of first appearance,
+        and writes all remaining words. Returns number of words translated.
+        """
+
+        variable = 16
+        for symbol, addresses in self._references.items():
+            self._symbols.add_entry(symbol, variable)
+            for address in addresses:
+                self._buffer[address - self._written] = variable
+            variable += 1
+        self._references.clear()
+        self._waiting.clear()
+        self.flush()
+        return self._written
+
+
+def run(source=None, stream=None, format_name='hack', chunk_words=4096):
+    """
+    Translates lines from source, default sys.stdin, writing format_name output to stream, default sys.stdout,
+    or its binary buffer for binary formats. Returns number of words translated.
+    """
+
+    source = source if source is not None else sys.stdin
+    if stream is None:
+        stream = sys.stdout.buffer if 'b' in output.formats[format_name][1] else sys.stdout
+    sink = output.Sink(stream, format_name)
+
+    def write(words):
+        sink(words)
+        stream.flush()
+
+    assembler = StreamAssembler(write, chunk_words)
+    for line in source:
+        assembler.feed(line)
+    return assembler.close()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Tokenizes assembly commands directly from bytes, such as a memory-mapped file, without making a string per line.
+Blank lines, comments and white space are skipped by one regular expression scan.
+"""
+
+import mmap
+import os
+import re
+from contextlib import contextmanager
+from assembler import code
+
+#token kinds, same as index of matching group in _command
+L_COMMAND = 1
+A_COMMAND = 2
+C_COMMAND = 3
+
+_command = re.compile(
+    rb'^[ \t\f\v\r]*'
+    rb'(?:\(([^)\n]*)\)'                       #(Xxx) label
+    rb'|@([^\s/]*)'                            #@Xxx symbol or decimal
+    rb'|([^\s/][^\n]*?|/[^/\n][^\n]*?))'       #dest=comp;jump
+    rb'[ \t\f\v\r]*(?://[^\n]*)?$', 
+    re.M)
+
+
+@contextmanager
+def mapped(fname):
+    """
+    Opens fname and yields its bytes as a read-only memory map, or as empty bytes for an empty file.
+    """
+    
+    with open(fname, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            yield b''
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+            
+
+def tokenize(data):
+    """
+    Yields (kind, value) for each command in bytes data. Kind is L_COMMAND, A_COMMAND or C_COMMAND.
+    Value is bytes of label name, A-command symbol or decimal, or C-command text without comment.
+    """
+    
+    for match in _command.finditer(data):
+        kind = match.lastindex
+        yield kind, match.group(kind)
+        
+
+#line ends, and blank, comment and label lines, counted by count_lines()
+_newline = re.compile(rb'\n')
+_blank = re.compile(rb'^[ \t\f\v\r]*$', re.M)
+_comment = re.compile(rb'^[ \t\f\v\r]*//', re.M)
+_label = re.compile(rb'^[ \t\f\v\r]*\(', re.M)
+
+
+def _count(pattern, data):
+    return sum(1 for match in pattern.finditer(data))
+
+
+def count_lines(data):
+    """
+    Returns dictionary with counts of lines, blank lines, comment lines and label lines in bytes data.
+    Matches are counted as they are found, so memory use does not grow with the number of lines.
+    """
+    
+    return {
+        'lines': _count(_newline, data) + (1 if len(data) and data[-1:] != b'\n' else 0),
+        'blank': _count(_blank, data) - (1 if data[-1:] == b'\n' else 0),
+        'comments': _count(_comment, data),
+        'labels': _count(_label, data)
+    }
+    
+
+def c_word(command):
+    """
+    Returns 16-bit word for bytes text of a C-command, such as b'D=D+M' or b'0;JMP'. White space is ignored.
+    """
+    
+    command = command.replace(b' ', b'').replace(b'\t', b'').decode()
+    dest, equals, rest = command.partition('=')
+    if not equals:
+        dest, rest = 'null', dest
+    comp, semicolon, jump = rest.partition(';')
+    return code.c_instruction[(dest, comp, jump if semicolon else 'null')]
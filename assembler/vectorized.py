@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Optional NumPy engine to translate a tokenized ir.Program in bulk, and to render .hack text in one vectorized step.
+If NumPy is not installed, available is False and Parser falls back to its pure Python passes.
+"""
+
+from array import array
+from assembler import ir
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+available = np is not None
+
+
+def translate(program, symbols, resolve, command_words):
+    """
+    Returns array('H') of translated words for program. Labels are added to symbols, a SymbolTable, 
+    with ROM addresses from a cumulative sum of commands. Resolve is called once for each distinct A-command symbol, 
+    in order of first appearance, so new variables get the same addresses as in the second pass. 
+    Command_words lists the word of each distinct C-command spelling in program.commands.
+    """
+    
+    if not len(program):
+        return array('H')
+        
+    kinds = np.frombuffer(program.kinds, dtype=np.uint8)
+    operands = np.frombuffer(program.operands, dtype=np.dtype(program.operands.typecode))
+    names = program.names
+    
+    #ROM address of each entry is the number of commands before it, labels after last command are never added
+    is_command = kinds != ir.L_COMMAND
+    addresses = np.cumsum(is_command) - is_command
+    rows = np.flatnonzero(~is_command & (addresses < int(is_command.sum())))
+    for name_id, address in zip(operands[rows].tolist(), addresses[rows].tolist()):
+        symbols.add_entry(names[name_id], address)
+        
+    is_symbol = kinds == ir.A_SYMBOL
+    symbol_ids = operands[is_symbol]
+    unique_ids, first = np.unique(symbol_ids, return_index=True)
+    name_addresses = np.zeros(len(names), dtype=np.uint16)
+    for name_id in unique_ids[np.argsort(first)].tolist():
+        name_addresses[name_id] = resolve(names[name_id]) & 0x7FFF
+        
+    words = np.zeros(len(kinds), dtype=np.uint16)
+    is_number = kinds == ir.A_NUMBER
+    words[is_number] = operands[is_number]
+    words[is_symbol] = name_addresses[symbol_ids]
+    is_c = kinds == ir.C_COMMAND
+    words[is_c] = np.array(command_words, dtype=np.uint16)[operands[is_c]]
+    
+    translation = array('H')
+    translation.frombytes(words[is_command].tobytes())
+    return translation
+    
+
+def to_text(words):
+    """
+    Returns .hack text for 16-bit words, such as array('H'), rendering all lines at once.
+    """
+    
+    if not len(words):
+        return ''
+    values = np.frombuffer(words, dtype=np.uint16)
+    lines = np.empty((len(values), 17), dtype=np.uint8)
+    lines[:, :16] = ((values[:, None] >> np.arange(15, -1, -1, dtype=np.uint16)) & 1) + ord('0')
+    lines[:, 16] = ord('\n')
+    return lines.tobytes().decode('ascii')
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Verifies translated files against expected ones, and disassembles them back to mnemonics.
+Files can be .hack text or raw binary images. Identical files of the same format are found equal 
+by streaming memory-mapped bytes, and words are only decoded when files differ.
+"""
+
+import os
+import sys
+from array import array
+from assembler import code
+from assembler import tokenizer
+
+#file extension: format name, longest extensions first
+_extensions = [('.le.bin', 'bin-le'), ('.bin', 'bin'), ('.hack', 'hack')]
+
+_block = 1 << 20
+
+
+def format_of(fname):
+    """
+    Returns format name of fname from its extension: hack, bin or bin-le. Other files are taken as hack.
+    """
+    
+    for extension, format_name in _extensions:
+        if fname.endswith(extension):
+            return format_name
+    return 'hack'
+    
+
+def read_words(fname, format_name=None):
+    """
+    Returns array('H') of words in fname, a .hack text file or a big-endian or little-endian binary image.
+    """
+    
+    format_name = format_name or format_of(fname)
+    words = array('H')
+    with tokenizer.mapped(fname) as data:
+        if format_name == 'hack':
+            lines = bytes(data).split()
+            digits = b''.join(lines)
+            if lines and len(digits) == 16 * len(lines):
+                #all lines are 16 digits, so whole file converts as one binary number
+                words.frombytes(int(digits, 2).to_bytes(2 * len(lines), 'big'))
+                if sys.byteorder == 'little':
+                    words.byteswap()
+            else:
+                words.extend(int(line, 2) for line in lines)
+        else:
+            words.frombytes(bytes(data[: len(data) // 2 * 2]))
+            if (format_name == 'bin-le') != (sys.byteorder == 'little'):
+                words.byteswap()
+    return words
+    
+
+def same_bytes(expected, actual):
+    """
+    Returns True if files expected and actual have the same bytes, compared a block at a time from memory maps.
+    """
+    
+    if os.path.getsize(expected) != os.path.getsize(actual):
+        return False
+    with tokenizer.mapped(expected) as a, tokenizer.mapped(actual) as b:
+        for start in range(0, len(a), _block):
+            if a[start : start + _block] != b[start : start + _block]:
+                return False
+    return True
+    
+
+def compare(expected, actual, limit=10, expected_format=None, actual_format=None):
+    """
+    Compares files expected and actual, and returns list of up to limit differences (rom_address, expected_word, actual_word). 
+    A word missing from the shorter file is None. Returns an empty list if the files match.
+    """
+    
+    expected_format = expected_format or format_of(expected)
+    actual_format = actual_format or format_of(actual)
+    if expected_format == actual_format and same_bytes(expected, actual):
+        return []
+        
+    expected_words = read_words(expected, expected_format)
+    actual_words = read_words(actual, actual_format)
+    differences = []
+    for address in range(max(len(expected_words), len(actual_words))):
+        expected_word = expected_words[address] if address < len(expected_words) else None
+        actual_word = actual_words[address] if address < len(actual_words) else None
+        if expected_word != actual_word:
+            differences.append((address, expected_word, actual_word))
+            if len(differences) == limit:
+                break
+    return differences
+    
+
+def describe(word):
+    if word is None:
+        return 'missing'
+    return format(word, '016b') + ' ' + code.mnemonic(word)
+    
+
+def report(differences):
+    """
+    Returns text with one line per difference, each word shown in binary and decoded to its mnemonic.
+    """
+    
+    return ''.join('ROM[' + str(address) + ']: expected ' + describe(expected_word) + ', got ' + describe(actual_word) + '\n'
+                   for address, expected_word, actual_word in differences)
+                   
+
+def disassemble(words):
+    """
+    Returns assembly text for words, one mnemonic per line, using a table of all 65536 words.
+    """
+    
+    return ''.join(map(code.mnemonic_table().__getitem__, words))
@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Benchmarks for the assembler, run on reproducible generated programs. 
+To run benchmarks and compare with committed baseline: prompt> python -m benchmarks
+"""
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*- 
+
+"""
+benchmarks.__main__: executed when benchmarks directory is called as script.
+To save new baseline: prompt> python -m benchmarks --save benchmarks/baseline.json
+""" 
+
+import argparse
+import json
+import os
+import sys
+from .run import run, compare, print_results
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+arg_parser = argparse.ArgumentParser(prog='benchmarks', description='Hack assembler benchmarks')
+arg_parser.add_argument('--lines', type=int, default=100000, help='lines per generated program (default: 100000)')
+arg_parser.add_argument('--seed', type=int, default=0, help='seed for generated programs (default: 0)')
+arg_parser.add_argument('--repeat', type=int, default=3, help='runs per benchmark, fastest is kept (default: 3)')
+arg_parser.add_argument('--baseline', default=BASELINE, help='JSON results to compare with (default: benchmarks/baseline.json)')
+arg_parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown ratio before failing (default: 0.25)')
+arg_parser.add_argument('--save', default=None, help='save results as JSON to this file')
+args = arg_parser.parse_args()
+
+results = run(args.lines, args.seed, repeat=args.repeat)
+
+baseline = None
+if os.path.exists(args.baseline):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+        
+print_results(results, baseline)
+
+if args.save:
+    with open(args.save, 'w') as f:
+        json.dump(results, f, indent=2)
+        
+if baseline is not None:
+    regressions = compare(results, baseline, args.tolerance)
+    for name, ratio in regressions:
+        print('REGRESSION ' + name + ': x' + format(ratio, '.2f') + ' of baseline lines per second')
+    if regressions:
+        sys.exit(1)
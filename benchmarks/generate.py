@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Generates reproducible Hack assembly programs from a seed, for benchmarks.
+Each kind stresses a different part of the assembler: 
+- large: plain mix of A- and C-commands with a few labels and variables
+- labels: many labels and jumps, most of them forward references
+- variables: many distinct variables, allocated from address 16
+- comments: many comment lines, blank lines and inline comments
+"""
+
+import random
+from assembler import code
+
+kinds = ['large', 'labels', 'variables', 'comments']
+
+_c_commands = [(d, c, j) for d in code.dest for c in code.comp for j in code.jump if d == 'null' or j == 'null']
+
+
+def _c_command(rng):
+    dest, comp, jump = rng.choice(_c_commands)
+    command = comp
+    if dest != 'null':
+        command = dest + '=' + command
+    if jump != 'null':
+        command = command + ';' + jump
+    return command
+    
+
+def generate(kind, lines=100000, seed=0):
+    """
+    Returns list of about lines assembly lines of given kind, the same for the same seed.
+    """
+    
+    rng = random.Random(seed)
+    labels = max(1, lines // (8 if kind == 'labels' else 500))
+    variables = max(1, lines // (8 if kind == 'variables' else 500))
+    undefined = list(range(labels)) #labels not defined yet, each is defined once
+    program = []
+    
+    while len(program) < lines:
+        roll = rng.random()
+        if kind == 'comments' and roll < 0.5:
+            program.append(rng.choice(['// comment ' + str(len(program)), '', '   // indented comment']))
+        elif roll < 0.15:
+            program.append('@' + str(rng.randrange(32768)))
+        elif roll < 0.3 or (kind == 'variables' and roll < 0.5):
+            program.append('@var' + str(rng.randrange(variables)))
+        elif roll < 0.35 or (kind == 'labels' and roll < 0.6):
+            program.append('@LABEL' + str(rng.randrange(labels)))
+            program.append('0;JMP')
+        elif undefined and (roll < 0.37 or (kind == 'labels' and roll < 0.7)):
+            label = undefined.pop(rng.randrange(len(undefined)))
+            program.append('(LABEL' + str(label) + ')')
+        elif kind == 'comments':
+            program.append('   ' + _c_command(rng) + '    // inline comment')
+        else:
+            program.append(_c_command(rng))
+            
+    #define labels not defined yet, so references are not taken as variables
+    for label in sorted(undefined):
+        program.append('(LABEL' + str(label) + ')')
+        program.append('0;JMP')
+        
+    return program
+    
+
+def write(fname, kind, lines=100000, seed=0):
+    """
+    Writes generated program of given kind to fname. No return.
+    """
+    
+    with open(fname, 'w') as f:
+        f.write('\n'.join(generate(kind, lines, seed)) + '\n')
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Runs generated programs through Parser, and reports lines per second, time of each phase and peak memory.
+Results are compared with a baseline, to catch regressions with numbers. They are saved as JSON by benchmarks/__main__.py.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+from assembler import vectorized
+from assembler.parser import Parser
+from benchmarks import generate
+
+
+def _phases(fname, output_dir, engine):
+    phases = {}
+    
+    start = time.perf_counter()
+    p = Parser(fname, output_dir=output_dir, verbose=False, mapped=(engine == 'mapped'), vectorized=(engine == 'numpy'))
+    phases['read'] = time.perf_counter() - start
+    
+    if engine == 'two_pass':
+        start = time.perf_counter()
+        p.run_first_pass()
+        phases['first_pass'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        p.encode_program()
+        phases['second_pass'] = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        p.write()
+        phases['write'] = time.perf_counter() - start
+        
+    else:
+        #single pass, mapped and numpy engines translate and write in one call
+        runs = {'single_pass': p.run_single_pass, 'mapped': p.run_mapped, 'numpy': p.run_vectorized}
+        start = time.perf_counter()
+        runs[engine]()
+        phases['translate'] = time.perf_counter() - start
+        
+    return phases
+    
+
+#numpy engine is only benchmarked if NumPy is installed
+engines = ['two_pass', 'single_pass', 'mapped'] + (['numpy'] if vectorized.available else [])
+
+
+def run(lines=100000, seed=0, engines=engines, repeat=3):
+    """
+    Runs each generated program kind through each engine, repeat times, keeping the fastest time of each phase.
+    Peak memory is measured with tracemalloc in one extra run. Returns results dictionary.
+    """
+    
+    folder = tempfile.mkdtemp()
+    results = {'lines': lines, 'seed': seed, 'benchmarks': {}}
+    try:
+        for kind in generate.kinds:
+            fname = os.path.join(folder, kind + '.asm')
+            generate.write(fname, kind, lines, seed)
+            with open(fname) as f:
+                line_count = sum(1 for line in f)
+                
+            for engine in engines:
+                best = {}
+                for x in range(repeat):
+                    for phase, seconds in _phases(fname, folder, engine).items():
+                        best[phase] = min(seconds, best.get(phase, seconds))
+                        
+                tracemalloc.start()
+                _phases(fname, folder, engine)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                
+                total = sum(best.values())
+                results['benchmarks'][kind + '/' + engine] = {
+                    'lines': line_count,
+                    'seconds': total,
+                    'lines_per_second': line_count / total,
+                    'phases': best,
+                    'peak_memory': peak
+                }
+    finally:
+        shutil.rmtree(folder)
+        
+    return results
+    
+
+def compare(results, baseline, tolerance=0.25):
+    """
+    Compares lines per second of results with baseline. Returns list of (name, ratio) regressions, 
+    for benchmarks more than tolerance slower than baseline.
+    """
+    
+    regressions = []
+    for name, result in results['benchmarks'].items():
+        if name in baseline['benchmarks']:
+            ratio = result['lines_per_second'] / baseline['benchmarks'][name]['lines_per_second']
+            if ratio < 1 - tolerance:
+                regressions.append((name, ratio))
+    return regressions
+    
+
+def print_results(results, baseline=None):
+    """
+    Prints one line per benchmark, with ratio to baseline if given. No return.
+    """
+    
+    for name, result in results['benchmarks'].items():
+        line = (name.ljust(24) + format(result['lines_per_second'], '12,.0f') + ' lines/s' + 
+                format(result['peak_memory'] / 1048576, '9.1f') + ' MB peak  ' + 
+                ', '.join(phase + ' ' + format(seconds * 1000, '.1f') + ' ms' for phase, seconds in result['phases'].items()))
+        if baseline is not None and name in baseline['benchmarks']:
+            line += '  x' + format(result['lines_per_second'] / baseline['benchmarks'][name]['lines_per_second'], '.2f')
+        print(line)
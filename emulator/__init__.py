@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Hack CPU emulator, to smoke-test assembled ROMs without an external simulator.
+To run a ROM for 1,000,000 cycles and report cycles per second: prompt> python -m emulator data/output/Pong.hack --cycles 1000000
+"""
+
+from .cpu import CPU, load, execute
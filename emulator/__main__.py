@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*- 
+
+"""
+emulator.__main__: executed when emulator directory is called as script.
+To set RAM before running, and print RAM words after: prompt> python -m emulator data/output/Max.hack --set 0=3 1=5 --show 2
+To save a screen snapshot: prompt> python -m emulator data/output/Rect.hack --set 0=20 --screen rect.pbm
+""" 
+
+import argparse
+import json
+from .cpu import execute
+
+arg_parser = argparse.ArgumentParser(prog='emulator', description='Hack CPU emulator')
+arg_parser.add_argument('fname', help='.hack, .bin, .le.bin or .asm file to run')
+arg_parser.add_argument('--cycles', type=int, default=10000000, help='cycle budget (default: 10000000)')
+arg_parser.add_argument('--set', nargs='*', metavar='ADDRESS=VALUE', default=[], help='RAM words to set before running')
+arg_parser.add_argument('--show', nargs='*', metavar='ADDRESS', type=int, default=[], help='RAM words to print after running')
+arg_parser.add_argument('--screen', default=None, help='save screen snapshot to this PBM file')
+args = arg_parser.parse_args()
+
+ram = dict(tuple(int(part) for part in item.split('=', 1)) for item in args.set)
+cpu, report = execute(args.fname, args.cycles, ram, args.screen)
+report['ram'] = {str(address): cpu.ram[address] for address in args.show}
+print(json.dumps(report, indent=2))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*- 
+
+"""
+CPU decodes each ROM word once into a dispatch table, using comp, dest and jump tables in assembler/code.py, 
+then runs the fetch-execute loop on registers A, D and PC, and RAM as a flat array of 16-bit words.
+"""
+
+import sys
+import time
+from array import array
+from assembler import api
+from assembler import code
+from assembler import verify
+
+SCREEN = 16384
+KBD = 24576
+SCREEN_WIDTH = 512
+SCREEN_HEIGHT = 256
+
+#comp mnemonic with A operand: function of D and A, or of D and M for the matching M mnemonic
+_alu = {
+    '0': lambda d, x: 0,
+    '1': lambda d, x: 1,
+    '-1': lambda d, x: 0xFFFF,
+    'D': lambda d, x: d,
+    'A': lambda d, x: x,
+    '!D': lambda d, x: d ^ 0xFFFF,
+    '!A': lambda d, x: x ^ 0xFFFF,
+    '-D': lambda d, x: -d & 0xFFFF,
+    '-A': lambda d, x: -x & 0xFFFF,
+    'D+1': lambda d, x: (d + 1) & 0xFFFF,
+    'A+1': lambda d, x: (x + 1) & 0xFFFF,
+    'D-1': lambda d, x: (d - 1) & 0xFFFF,
+    'A-1': lambda d, x: (x - 1) & 0xFFFF,
+    'D+A': lambda d, x: (d + x) & 0xFFFF,
+    'D-A': lambda d, x: (d - x) & 0xFFFF,
+    'A-D': lambda d, x: (x - d) & 0xFFFF,
+    'D&A': lambda d, x: d & x,
+    'D|A': lambda d, x: d | x
+}
+
+#7-bit comp field: (alu function, reads M)
+_comp = {int(bits, 2): (_alu[mnemonic.replace('M', 'A')], bits[0] == '1') for mnemonic, bits in code.comp.items()}
+
+#3-bit jump field: jump taken for result (positive, zero, negative)
+_jump = {int(bits, 2): (bits[2] == '1', bits[1] == '1', bits[0] == '1') for bits in code.jump.values()}
+
+#bit-reversed bytes, since leftmost pixel is the lowest bit of a screen word, but highest bit of a PBM byte
+_reversed_bits = bytes(int(format(byte, '08b')[::-1], 2) for byte in range(256))
+
+
+def decode(words):
+    """
+    Returns list with one entry per ROM word: the int value for A-instructions, or 
+    (alu, reads_m, dest, jump) tuple for C-instructions, where dest holds code.dest bits and jump is a
+    (positive, zero, negative) tuple, or None for no jump. Raises ValueError for a word that is not an instruction.
+    """
+    
+    decoded = []
+    for address, word in enumerate(words):
+        if word < 0x8000:
+            decoded.append(word)
+        elif word >> 13 == 0b111 and (word >> 6) & 0x7F in _comp:
+            alu, reads_m = _comp[(word >> 6) & 0x7F]
+            decoded.append((alu, reads_m, (word >> 3) & 7, _jump[word & 7] if word & 7 else None))
+        else:
+            raise ValueError('invalid instruction at ROM[' + str(address) + ']: ' + format(word, '016b'))
+    return decoded
+    
+
+def load(fname):
+    """
+    Returns array('H') ROM words of fname: .asm source is assembled, .hack and binary images are read.
+    """
+    
+    if fname.endswith('.asm'):
+        with open(fname) as f:
+            return api.assemble(f)
+    return verify.read_words(fname)
+    
+
+class CPU:
+    """
+    Hack computer with ROM words, registers a, d and pc, and 64K words of ram. 
+    The screen is mapped at SCREEN and keyboard at KBD, as on the Hack platform.
+    """
+    
+    def __init__(self, words):
+        self.rom = array('H', words)
+        self._decoded = decode(self.rom)
+        self.ram = array('H', bytes(2 << 16))
+        self.reset()
+        
+    def reset(self):
+        """
+        Sets registers and cycle count to zero, keeping ram. No return.
+        """
+        
+        self.a = self.d = self.pc = 0
+        self.cycles = 0
+        self.halted = False
+        
+    def run(self, budget):
+        """
+        Executes up to budget instructions and returns number executed. Stops early, setting halted, 
+        if pc leaves ROM, or at an unconditional jump to the @address just before it, the usual end loop.
+        """
+        
+        decoded = self._decoded
+        size = len(decoded)
+        ram = self.ram
+        a, d, pc = self.a, self.d, self.pc
+        executed = 0
+        
+        for executed in range(budget):
+            if pc >= size:
+                self.halted = True
+                break
+            instruction = decoded[pc]
+            if instruction.__class__ is int:
+                a = instruction
+                pc += 1
+                continue
+                
+            alu, reads_m, dest, jump = instruction
+            out = alu(d, ram[a] if reads_m else a)
+            target = a
+            if dest:
+                if dest & 1:
+                    ram[a] = out
+                if dest & 2:
+                    d = out
+                if dest & 4:
+                    a = out
+            if jump is not None and jump[1 if out == 0 else 2 if out & 0x8000 else 0]:
+                if target == pc - 1 and jump == (True, True, True) and decoded[target] == target:
+                    self.halted = True
+                    pc = target
+                    executed += 1
+                    break
+                pc = target
+            else:
+                pc += 1
+        else:
+            executed = budget
+            
+        self.a, self.d, self.pc = a, d, pc
+        self.cycles += executed
+        return executed
+        
+    def screen(self):
+        """
+        Returns snapshot of screen memory as array('H'), 32 words per row of 512 pixels.
+        """
+        
+        return self.ram[SCREEN : KBD]
+        
+    def save_screen(self, fname):
+        """
+        Saves screen snapshot to fname as a binary PBM image, 512 x 256 pixels. No return.
+        """
+        
+        words = self.screen()
+        if sys.byteorder != 'little':
+            words.byteswap()
+        with open(fname, 'wb') as f:
+            f.write(b'P4\n' + str(SCREEN_WIDTH).encode() + b' ' + str(SCREEN_HEIGHT).encode() + b'\n')
+            f.write(words.tobytes().translate(_reversed_bits))
+            
+    
+def execute(fname, budget, ram=None, screen=None):
+    """
+    Loads fname into a new CPU, sets ram from dictionary of address to value, and runs up to budget cycles.
+    Saves screen snapshot to screen file name, if set. 
+    Returns (cpu, report) where report is a dictionary of cycles, seconds, cycles_per_second and halted.
+    """
+    
+    cpu = CPU(load(fname))
+    for address, value in (ram or {}).items():
+        cpu.ram[address] = value & 0xFFFF
+        
+    start = time.perf_counter()
+    cycles = cpu.run(budget)
+    seconds = time.perf_counter() - start
+    
+    if screen is not None:
+        cpu.save_screen(screen)
+    report = {'file': fname, 'cycles': cycles, 'seconds': seconds, 
+              'cycles_per_second': cycles / seconds if seconds else 0.0, 'halted': cpu.halted}
+    return cpu, report
@@ -11,7 +11,7 @@ from .context import assembler
 from assembler import parser
 from assembler import code 
 import unittest
-import filecmp
+from assembler import verify
 
 class Code(unittest.TestCase):
     """
@@ -24,6 +24,20 @@ class Code(unittest.TestCase):
         for key,value in code.comp.items():
             self.assertEqual(len(value), 7)                    
 
+    def test_c_instruction(self):
+        self.assertEqual(len(code.c_instruction), 8 * 28 * 8)
+        self.assertEqual(code.c_instruction[('MD', 'M-1', 'null')], 0b1111110010011000)
+        
+    def test_cache(self):
+        cache = code.InstructionCache(maxsize=2)
+        self.assertIsNone(cache.get('D=A'))
+        cache.put('D=A', '1110110000010000')
+        self.assertEqual(cache.get('D=A'), '1110110000010000')
+        cache.put('M=D', '1110001100001000')
+        cache.put('0;JMP', '1110101010000111')
+        self.assertIsNone(cache.get('D=A'))
+        self.assertEqual(cache.info(), {'hits': 1, 'misses': 2, 'size': 2, 'maxsize': 2})
+
 class Add(unittest.TestCase):
     """
     Check Add.asm.
@@ -150,10 +164,10 @@ class Compare(unittest.TestCase):
     print('\nCOMPARING OUTPUTS')       
 
     def test_run(self):
-        self.assertTrue(filecmp.cmp('./data/output/Add.hack', './data/compare/Add.hack'))          
-        self.assertTrue(filecmp.cmp('./data/output/MaxL.hack', './data/compare/MaxL.hack'))
-        self.assertTrue(filecmp.cmp('./data/output/PongL.hack', './data/compare/PongL.hack'))
-        self.assertTrue(filecmp.cmp('./data/output/RectL.hack', './data/compare/RectL.hack'))        
+        self.assertEqual(verify.report(verify.compare('./data/compare/Add.hack', './data/output/Add.hack')), '')          
+        self.assertEqual(verify.report(verify.compare('./data/compare/MaxL.hack', './data/output/MaxL.hack')), '')
+        self.assertEqual(verify.report(verify.compare('./data/compare/PongL.hack', './data/output/PongL.hack')), '')
+        self.assertEqual(verify.report(verify.compare('./data/compare/RectL.hack', './data/output/RectL.hack')), '')        
 
         
 if __name__=='__main__':
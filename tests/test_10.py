@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for JSON-line server.
+To run tests in command line, i.e. for test_10 tests: prompt> python -m tests.test_10
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import server
+import unittest
+import asyncio
+import json
+
+class Server(unittest.TestCase):
+    """
+    Check concurrent requests through Server, including failing ones
+    """
+    
+    print('\nRUNNING Server')       
+
+    def setUp(self):
+        self.server = server.Server(jobs=2)
+        
+    def tearDown(self):
+        self.server.close()
+       
+    def test_run(self):
+        with open('./data/input/Max.asm') as f:
+            source = f.read()
+        with open('./data/compare/Max.hack') as f:
+            compare = f.read()
+        lines = [json.dumps({'id': 1, 'source': source}), json.dumps({'id': 2, 'source': 'D=Q'}), 
+                 json.dumps({'id': 3, 'source': '@5', 'format': 'words'}), '{']
+                 
+        async def run():
+            return await asyncio.gather(*[self.server.handle(line) for line in lines])
+        responses = asyncio.run(run())
+        
+        self.assertEqual(responses[0]['output'], compare)
+        self.assertFalse(responses[1]['ok'])
+        self.assertEqual(responses[2]['output'], [5])
+        self.assertEqual((responses[3]['id'], responses[3]['ok']), (None, False))
+        self.assertEqual(sorted(response['queue_depth'] for response in responses), [0, 1, 2, 3])
+        self.assertEqual((self.server.pending, self.server.served), (0, 4))
+
+        
+if __name__=='__main__':
+    unittest.main()          
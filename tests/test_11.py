@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for relocatable object files and linker.
+To run tests in command line, i.e. for test_11 tests: prompt> python -m tests.test_11
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import linker
+from assembler import parser
+from assembler import api
+import unittest
+
+class Link(unittest.TestCase):
+    """
+    Check Pong.asm split into modules, compiled to object files and linked, matches correct version
+    """
+    
+    print('\nRUNNING linker module')       
+
+    def setUp(self):
+        with open('./data/input/Pong.asm') as f:
+            self.lines = [line.strip() for line in f.readlines()]
+            
+    def test_run(self):
+        cuts = [0, 29, 46, 5014, 20000, len(self.lines)]
+        objects = []
+        for start, end in zip(cuts, cuts[1:]):
+            obj = linker.compile_module(parser.Parser('<module>', content=self.lines[start : end]))
+            objects.append(linker.ObjectFile.from_json(obj.to_json()))
+        self.assertEqual(linker.link(objects), api.assemble(self.lines))
+        
+    def test_object_file(self):
+        obj = linker.compile_file('./data/input/Rect.asm')
+        self.assertEqual(obj.exports, {'LOOP': 10, 'INFINITE_LOOP': 23})
+        self.assertEqual(obj.imports, ['counter', 'address'])
+        self.assertEqual(obj.relocations, [2, 21, 23])
+        
+    def test_duplicate_label(self):
+        obj = linker.compile_file('./data/input/Max.asm')
+        with self.assertRaises(ValueError):
+            linker.link([obj, obj])
+
+        
+if __name__=='__main__':
+    unittest.main()          
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for verifier and disassembler.
+To run tests in command line, i.e. for test_12 tests: prompt> python -m tests.test_12
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import code
+from assembler import output
+from assembler import verify
+from assembler import api
+import unittest
+import os
+import shutil
+import tempfile
+
+class Verify(unittest.TestCase):
+    """
+    Check files are compared as words, across formats, with differences decoded to mnemonics
+    """
+    
+    print('\nRUNNING verify module')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.words = verify.read_words('./data/compare/Max.hack')
+        
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def save(self, name, words, format_name='hack'):
+        fname = os.path.join(self.folder, name)
+        output.write(words, fname, format_name)
+        return fname
+        
+    def test_read_words(self):
+        with open('./data/input/Max.asm') as f:
+            self.assertEqual(self.words, api.assemble(f))
+        for name, format_name in [('Max.bin', 'bin'), ('Max.le.bin', 'bin-le')]:
+            self.assertEqual(verify.read_words(self.save(name, self.words, format_name)), self.words)
+            
+    def test_compare(self):
+        self.assertEqual(verify.compare('./data/compare/Max.hack', self.save('Max.hack', self.words)), [])
+        self.assertEqual(verify.compare('./data/compare/Max.hack', self.save('Max.bin', self.words, 'bin')), [])
+        
+        changed = self.words[:]
+        changed[3] = code.c_instruction[('D', 'M', 'null')]
+        differences = verify.compare('./data/compare/Max.hack', self.save('Changed.hack', changed[:-1]))
+        self.assertEqual(differences, [(3, self.words[3], changed[3]), (len(self.words) - 1, self.words[-1], None)])
+        self.assertEqual(verify.report(differences).splitlines()[0], 
+                         'ROM[3]: expected 1111010011010000 D=D-M, got 1111110000010000 D=M')
+        self.assertEqual(len(verify.compare('./data/compare/Max.hack', self.save('Empty.hack', []), limit=3)), 3)
+        
+    def test_disassemble(self):
+        text = verify.disassemble(self.words)
+        self.assertEqual(text.splitlines()[:5], ['@0', 'D=M', '@1', 'D=D-M', '@10'])
+        self.assertEqual(api.assemble(text.splitlines()), self.words)
+        self.assertEqual(code.mnemonic(0b1110101010000111), '0;JMP')
+        self.assertEqual(code.mnemonic(0x8000), '// invalid 1000000000000000')
+        
+        
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for the Hack CPU emulator running assembled ROMs.
+To run tests in command line, i.e. for test_13 tests: prompt> python -m tests.test_13
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from emulator import cpu
+import unittest
+import os
+import tempfile
+
+class Emulator(unittest.TestCase):
+    """
+    Check ROMs in data/compare run to expected RAM and screen contents
+    """
+    
+    print('\nRUNNING emulator package')       
+
+    def test_add(self):
+        machine, report = cpu.execute('./data/compare/Add.hack', 1000)
+        self.assertTrue(report['halted'])
+        self.assertEqual(machine.ram[0], 5)
+        
+    def test_max(self):
+        for x, y in [(3, 5), (9, 2), (-4, -7)]:
+            machine, report = cpu.execute('./data/input/Max.asm', 1000, {0: x, 1: y})
+            self.assertEqual(machine.ram[2], max(x, y) & 0xFFFF)
+            
+    def test_screen(self):
+        fname = os.path.join(tempfile.mkdtemp(), 'Rect.pbm')
+        machine, report = cpu.execute('./data/compare/Rect.hack', 10000, {0: 4}, fname)
+        self.assertTrue(report['halted'])
+        self.assertEqual(list(machine.screen()[: 4 * 32 : 32]), [0xFFFF] * 4)
+        self.assertEqual(sum(1 for word in machine.screen() if word), 4)
+        with open(fname, 'rb') as f:
+            data = f.read()
+        self.assertEqual(data[: 15], b'P4\n512 256\n\xff\xff\x00\x00')
+        self.assertEqual(len(data), 11 + 512 * 256 // 8)
+        os.remove(fname)
+        
+    def test_budget(self):
+        machine = cpu.CPU(cpu.load('./data/compare/Pong.hack'))
+        self.assertEqual(machine.run(10000), 10000)
+        self.assertEqual(machine.run(5000), 5000)
+        self.assertEqual(machine.cycles, 15000)
+        self.assertFalse(machine.halted)
+        
+    def test_decode(self):
+        self.assertEqual(cpu.decode([17])[0], 17)
+        alu, reads_m, dest, jump = cpu.decode([0b1111110010011000])[0]
+        self.assertEqual((alu(0, 7), reads_m, dest, jump), (6, True, 3, None))
+        with self.assertRaises(ValueError):
+            cpu.decode([0, 0x8000])
+            
+        
+if __name__=='__main__':
+    unittest.main()
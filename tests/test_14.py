@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for peephole optimizer rules and dead-code elimination.
+To run tests in command line, i.e. for test_14 tests: prompt> python -m tests.test_14
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import parser
+from assembler import verify
+from emulator.cpu import CPU
+import unittest
+
+class Optimizer(unittest.TestCase):
+    """
+    Check each rule removes instructions only where safe, and label addresses follow the smaller program
+    """
+    
+    print('\nRUNNING optimizer module')       
+
+    def optimize(self, content):
+        p = parser.Parser('<test>', content=list(content), optimize=True)
+        p.run_first_pass()
+        return verify.disassemble(p.encode_program()).splitlines(), p._optimizations
+        
+    def test_redundant_load(self):
+        lines, saved = self.optimize(['@5', 'D=A', '@5', 'M=D', '@7', 'A=M', '@7', 'M=0', '(LOOP)', '@7', 'M=D'])
+        self.assertEqual(lines, ['@5', 'D=A', 'M=D', '@7', 'A=M', '@7', 'M=0', '@7', 'M=D'])
+        self.assertEqual(saved['redundant_load'], 1)
+        
+    def test_jump_to_next(self):
+        lines, saved = self.optimize(['D=M', '@NEXT', 'D;JGT', '(NEXT)', '@NEXT', '0;JMP'])
+        self.assertEqual(lines, ['D=M', '@1', '0;JMP'])
+        self.assertEqual(saved['jump_to_next'], 2)
+        
+        #A holds label address after label, and next instruction reads it
+        lines, saved = self.optimize(['@NEXT', '0;JMP', '(NEXT)', 'D=A'])
+        self.assertEqual(lines, ['@2', '0;JMP', 'D=A'])
+        
+    def test_constant_load(self):
+        lines, saved = self.optimize(['@0', 'D=A', '@SP', 'M=D', '@1', 'D=A', '@0', 'D=A', 'M=D'])
+        self.assertEqual(lines, ['D=0', '@0', 'M=D', 'D=1', '@0', 'D=A', 'M=D'])
+        self.assertEqual(saved['constant_load'], 2)
+        
+    def test_numbers_jumped_to(self):
+        #loop back to ROM 4 runs until R0 is 0, with or without the @R0 dropped before it
+        content = ['@3', 'D=A', '@R0', 'M=D', '@R0', 'M=M-1', '@R0', 'D=M', '@4', 'D;JGT', '@R1', 'M=1', '(END)', '@END', '0;JMP']
+        for optimize in (False, True):
+            p = parser.Parser('<test>', content=list(content), optimize=optimize)
+            p.run_first_pass()
+            machine = CPU(p.encode_program())
+            machine.run(1000)
+            self.assertTrue(machine.halted)
+            self.assertEqual((machine.ram[0], machine.ram[1]), (0, 1))
+        self.assertEqual(p._optimizations['redundant_load'], 1)
+        
+        #number jumped to and also used as data cannot be moved
+        lines, saved = self.optimize(['@2', 'D=A', 'D;JGT', '@5', 'D=A', '@5', 'M=D'])
+        self.assertEqual(lines, ['@2', 'D=A', 'D;JGT', '@5', 'D=A', '@5', 'M=D'])
+        self.assertEqual(sum(saved.values()), 0)
+        
+    def test_content(self):
+        content = ['@0', 'D=A', '@SP', 'M=D']
+        p = parser.Parser('<test>', content=content, optimize=True, stats=True)
+        p.run_first_pass()
+        self.assertEqual(verify.disassemble(p.encode_program()).splitlines(), ['D=0', '@0', 'M=D'])
+        self.assertEqual(content, ['@0', 'D=A', '@SP', 'M=D'])
+        self.assertEqual(p.statistics()['counts']['lines'], 4)
+        
+    def test_return_addresses(self):
+        #return address 11 is stored as a number and jumped to through A=M, so it must not move
+        content = ['@11', 'D=A', '@R15', 'M=D', '@R15', 'A=M', '0;JMP', '@0', 'D=A', '@R2', 'M=D', '@R1', 'M=1', 
+                   '(END)', '@END', '0;JMP']
+        p = parser.Parser('<test>', content=list(content), optimize=True)
+        p.run_first_pass()
+        machine = CPU(p.encode_program())
+        machine.run(1000)
+        self.assertTrue(machine.halted)
+        self.assertEqual(machine.ram[1], 1)
+        self.assertEqual(sum(p._optimizations.values()), 0)
+        
+    def test_pong(self):
+        #PongL stores return addresses and call targets as numbers, and Pong reads numbers as data too
+        for name in ['Pong', 'PongL']:
+            for dead_code in (False, True):
+                p = parser.Parser('./data/input/' + name + '.asm', optimize=True, dead_code=dead_code)
+                p.run_first_pass()
+                self.assertEqual(p.encode_program(), verify.read_words('./data/compare/Pong.hack'))
+                self.assertEqual(sum(p._optimizations.values()), 0)
+        
+    def test_unchanged(self):
+        for name in ['Add', 'Max', 'Rect']:
+            p = parser.Parser('./data/input/' + name + '.asm', optimize=True)
+            p.run_first_pass()
+            self.assertEqual(p.encode_program(), verify.read_words('./data/compare/' + name + '.hack'))
+            
+
+class DeadCode(unittest.TestCase):
+    """
+    Check blocks that cannot be reached are dropped, labels and numbers jumped to follow, and removed ranges are reported
+    """
+    
+    def eliminate(self, content):
+        p = parser.Parser('<test>', content=list(content), dead_code=True)
+        p.run_first_pass()
+        return verify.disassemble(p.encode_program()).splitlines(), p._removed
+        
+    def test_labels(self):
+        lines, removed = self.eliminate(['@START', '0;JMP', '(UNUSED)', 'D=M', '@UNUSED', '0;JMP', '(START)', '@START', '0;JMP'])
+        self.assertEqual(lines, ['@2', '0;JMP', '@2', '0;JMP'])
+        self.assertEqual(removed, [{'lines': [2, 5], 'rom': [2, 4], 'labels': ['UNUSED']}])
+        
+        #return address loaded as data keeps its block
+        lines, removed = self.eliminate(['@RET', 'D=A', '@R15', 'M=D', '@R15', 'A=M', '0;JMP', '(RET)', 'D=0'])
+        self.assertEqual(removed, [])
+        
+    def test_numbers(self):
+        lines, removed = self.eliminate(['@4', '0;JMP', 'D=M', '0;JMP', '@0', 'M=D'])
+        self.assertEqual(lines, ['@2', '0;JMP', '@0', 'M=D'])
+        self.assertEqual(removed, [{'lines': [2, 3], 'rom': [2, 3], 'labels': []}])
+        
+        #jumps to symbols that are not labels cannot be followed
+        lines, removed = self.eliminate(['@R13', '0;JMP', 'D=M'])
+        self.assertEqual((lines, removed), (['@13', '0;JMP', 'D=M'], []))
+        
+    def test_jump_table(self):
+        #entries after TABLE are reached through A=D+A, and CASE1 only from an entry
+        content = ['@R0', 'D=M', 'D=D+M', '@TABLE', 'A=D+A', '0;JMP', '(TABLE)', '@CASE0', '0;JMP', '@CASE1', '0;JMP', 
+                   '(CASE0)', '@R1', 'M=0', '@END', '0;JMP', '(CASE1)', '@R1', 'M=1', '(END)', '@END', '0;JMP']
+        p = parser.Parser('<test>', content=list(content), dead_code=True)
+        p.run_first_pass()
+        machine = CPU(p.encode_program())
+        machine.ram[0] = 1
+        machine.run(1000)
+        self.assertTrue(machine.halted)
+        self.assertEqual(machine.ram[1], 1)
+        self.assertEqual(p._removed, [])
+        
+        #jumps to addresses computed from registers cannot be followed
+        lines, removed = self.eliminate(['@R0', 'A=M', 'A=A+1', '0;JMP', 'D=M'])
+        self.assertEqual(removed, [])
+        
+    def test_both(self):
+        #loop back to ROM 8 is moved once, for the dead block dropped and the @R0 dropped before it
+        content = ['@4', '0;JMP', 'D=M', '0;JMP', '@3', 'D=A', '@R0', 'M=D', '@R0', 'M=M-1', '@R0', 'D=M', '@8', 'D;JGT', 
+                   '@R1', 'M=1', '(END)', '@END', '0;JMP']
+        p = parser.Parser('<test>', content=list(content), dead_code=True, optimize=True)
+        p.run_first_pass()
+        words = p.encode_program()
+        machine = CPU(words)
+        machine.run(1000)
+        self.assertTrue(machine.halted)
+        self.assertEqual((machine.ram[0], machine.ram[1]), (0, 1))
+        self.assertEqual(p._removed, [{'lines': [2, 3], 'rom': [2, 3], 'labels': []}])
+        self.assertEqual(len(words) + 2 + sum(p._optimizations.values()), 18)
+        
+    def test_return_addresses(self):
+        #return address 11 is stored as a number and jumped to through A=M, so nothing may be dropped
+        content = ['@11', 'D=A', '@R15', 'M=D', '@R15', 'A=M', '0;JMP', '@0', 'D=A', '@R2', 'M=D', '@R1', 'M=1', 
+                   '(END)', '@END', '0;JMP']
+        p = parser.Parser('<test>', content=list(content), dead_code=True)
+        p.run_first_pass()
+        machine = CPU(p.encode_program())
+        machine.run(1000)
+        self.assertTrue(machine.halted)
+        self.assertEqual(machine.ram[1], 1)
+        self.assertEqual(p._removed, [])
+        
+    def test_pong(self):
+        #both read numbers as data and return through A=M, and PongL also stores return addresses as numbers
+        for name in ['Pong', 'PongL']:
+            p = parser.Parser('./data/input/' + name + '.asm', dead_code=True, stats=True)
+            p.run_first_pass()
+            self.assertEqual(p.encode_program(), verify.read_words('./data/compare/Pong.hack'))
+            self.assertEqual(p._removed, [])
+            self.assertEqual(p.statistics()['counts']['dead_code'], [])
+        
+        
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for streaming stdin to stdout.
+To run tests in command line, i.e. for test_15 tests: prompt> python -m tests.test_15
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import output
+from assembler import stream
+from assembler import verify
+import unittest
+import io
+import subprocess
+import sys
+
+class Stream(unittest.TestCase):
+    """
+    Check streamed words match correct versions, and resolved words are written before input ends
+    """
+    
+    print('\nRUNNING stream module')       
+
+    def test_run(self):
+        for name in ['Add', 'Max', 'Rect', 'Pong']:
+            text = io.StringIO()
+            with open('./data/input/' + name + '.asm') as f:
+                stream.run(f, text, chunk_words=100)
+            with open('./data/compare/' + name + '.hack') as f:
+                self.assertEqual(text.getvalue(), f.read())
+                
+    def test_forward_reference(self):
+        chunks = []
+        assembler = stream.StreamAssembler(lambda words: chunks.append(list(words)), chunk_words=1)
+        for line in ['@2', 'D=A', '@END', 'D;JGT', '@3']:
+            assembler.feed(line)
+        self.assertEqual(chunks, [[2], [0b1110110000010000]])
+        
+        assembler.feed('(END)')
+        self.assertEqual(chunks[2:], [[5, 0b1110001100000001, 3]])
+        assembler.feed('@i')
+        assembler.feed('M=0')
+        self.assertEqual(len(chunks), 3)
+        
+        self.assertEqual(assembler.close(), 7)
+        self.assertEqual(chunks[3:], [[16, 0b1110101010001000]])
+        
+    def test_stdin(self):
+        with open('./data/input/Max.asm', 'rb') as f:
+            result = subprocess.run([sys.executable, '-m', 'assembler', '-', '--format', 'bin-le'], stdin=f, capture_output=True, check=True)
+        self.assertEqual(result.stdout, output.to_binary(verify.read_words('./data/compare/Max.hack'), 'little'))
+        
+        
+if __name__=='__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for incremental reassembly from a source map.
+To run tests in command line, i.e. for test_16 tests: prompt> python -m tests.test_16
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import assembler as cli
+from assembler import incremental
+from assembler import verify
+from assembler.parser import Parser
+import unittest
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+class Incremental(unittest.TestCase):
+    """
+    Check incremental builds encode only changed blocks, and match full translations
+    """
+    
+    print('\nRUNNING incremental module')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.fname = os.path.join(self.folder, 'Pong.asm')
+        shutil.copy('./data/input/Pong.asm', self.fname)
+        os.makedirs(os.path.join(self.folder, 'full'))
+        with open(self.fname) as f:
+            self.lines = f.read().split('\n')
+            
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def edit(self, index, *lines):
+        self.lines[index : index] = lines
+        with open(self.fname, 'w') as f:
+            f.write('\n'.join(self.lines))
+            
+    def check(self):
+        """
+        Builds incrementally and with Parser, and returns summary after checking their words match.
+        """
+        
+        words, summary = incremental.build(self.fname, os.path.join(self.folder, 'out'), verbose=False)
+        Parser(self.fname, auto_run=True, output_dir=os.path.join(self.folder, 'full'), verbose=False)
+        self.assertEqual(verify.read_words(os.path.join(self.folder, 'full', 'Pong.hack')).tolist(), words.tolist())
+        self.assertEqual(verify.compare(os.path.join(self.folder, 'full', 'Pong.hack'), 
+                                        os.path.join(self.folder, 'out', 'Pong.hack')), [])
+        return summary
+        
+    def label_index(self, number):
+        return [index for index, line in enumerate(self.lines) if line.strip().startswith('(')][number]
+
+    def test_split_blocks(self):
+        self.assertEqual(incremental.split_blocks(b'@1\n(A)\nD=A\n  (B)\n'), [0, 3, 11])
+        self.assertEqual(incremental.split_blocks(b'(A)\n0;JMP\n'), [0])
+
+    def test_full_build(self):
+        summary = self.check()
+        self.assertTrue(summary['full'])
+        self.assertEqual(summary['encoded'], summary['blocks'])
+        self.assertEqual(verify.compare('./data/compare/Pong.hack', os.path.join(self.folder, 'out', 'Pong.hack')), [])
+        self.assertTrue(os.path.exists(os.path.join(self.folder, 'out', 'Pong.map.json')))
+        
+    def test_unchanged(self):
+        self.check()
+        summary = self.check()
+        self.assertEqual(summary['encoded'], 0)
+        self.assertFalse(summary['full'])
+        
+    def test_edit_block(self):
+        self.check()
+        self.edit(self.label_index(200) + 1, 'D=D+1', 'M=D')
+        summary = self.check()
+        self.assertEqual(summary['encoded'], 1)
+        
+        #new label moves every label after it, so reused words jumping to them are patched
+        self.edit(self.label_index(10), '(NEW_LABEL)', '@NEW_LABEL', '0;JMP')
+        summary = self.check()
+        self.assertEqual(summary['encoded'], 1)
+        self.assertFalse(summary['full'])
+        
+    def test_new_variable(self):
+        self.check()
+        self.edit(self.label_index(1) + 1, '@new_variable', 'M=0')
+        summary = self.check()
+        self.assertTrue(summary['full'])
+        
+    def test_stale_output(self):
+        self.check()
+        with open(os.path.join(self.folder, 'out', 'Pong.hack'), 'a') as f:
+            f.write('0000000000000000\n')
+        summary = self.check()
+        self.assertTrue(summary['full'])
+        
+    def test_optimize_rejected(self):
+        for flag in ['--optimize', '--dead-code']:
+            text = io.StringIO()
+            with contextlib.redirect_stderr(text), self.assertRaises(SystemExit):
+                cli.parse_args(['Pong.asm', '--incremental', flag])
+            self.assertIn('--incremental cannot be combined', text.getvalue())
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for pipelined reading, encoding and writing.
+To run tests in command line, i.e. for test_17 tests: prompt> python -m tests.test_17
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import verify
+from assembler.parser import Parser
+import unittest
+import os
+import shutil
+import tempfile
+
+class Pipelined(unittest.TestCase):
+    """
+    Check pipelined translations match correct versions for any block size, and stages report stalls
+    """
+    
+    print('\nRUNNING pipeline module')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+            
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+        
+    def test_compare(self):
+        for name in ['Add', 'Max', 'MaxL', 'Rect', 'RectL', 'Pong', 'PongL']:
+            for block_size in [64, 4096, 1 << 20]:
+                Parser('./data/input/' + name + '.asm', auto_run=True, output_dir=self.folder, verbose=False, 
+                       pipelined=True, block_size=block_size, queue_size=2)
+                self.assertEqual(verify.compare('./data/compare/' + name + '.hack', os.path.join(self.folder, name + '.hack')), [])
+                
+    def test_formats(self):
+        full = os.path.join(self.folder, 'full')
+        os.makedirs(full)
+        formats = ['hack', 'bin', 'bin-le', 'hex']
+        Parser('./data/input/Pong.asm', auto_run=True, output_dir=full, verbose=False, formats=formats)
+        Parser('./data/input/Pong.asm', auto_run=True, output_dir=self.folder, verbose=False, formats=formats, 
+               pipelined=True, block_size=256)
+        for extension in ['.hack', '.bin', '.le.bin', '.hex']:
+            with open(os.path.join(full, 'Pong' + extension), 'rb') as f, open(os.path.join(self.folder, 'Pong' + extension), 'rb') as g:
+                self.assertEqual(f.read(), g.read())
+                
+    def test_statistics(self):
+        p = Parser('./data/input/Pong.asm', auto_run=True, output_dir=self.folder, verbose=False, stats=True,
+                   pipelined=True, block_size=1024, queue_size=1)
+        statistics = p.statistics()
+        stages = statistics['counts']['pipeline']['stages']
+        self.assertEqual(stages['read']['bytes'], os.path.getsize('./data/input/Pong.asm'))
+        self.assertEqual(stages['encode']['words'], 27483)
+        self.assertEqual(stages['write']['bytes'], os.path.getsize(os.path.join(self.folder, 'Pong.hack')))
+        self.assertEqual(set(statistics['counts']['pipeline']['queues']), {'lines', 'chunks'})
+        self.assertEqual(statistics['counts']['variables'], 14)
+        self.assertIn('lines queue: full', p._pipeline.summary())
+        
+    def test_error(self):
+        fname = os.path.join(self.folder, 'Bad.asm')
+        with open(fname, 'w') as f:
+            f.write('@1\nD=A\n' * 1000 + 'D=Q\n')
+        with self.assertRaises(KeyError):
+            Parser(fname, auto_run=True, output_dir=self.folder, verbose=False, pipelined=True, block_size=64, queue_size=1)
+        self.assertFalse(os.path.exists(os.path.join(self.folder, 'Bad.hack')))
+        
+        
+if __name__ == '__main__':
+    unittest.main()
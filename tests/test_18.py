@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for batch grading of submissions against expected translated files.
+To run tests in command line, i.e. for test_18 tests: prompt> python -m tests.test_18
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import grading
+import unittest
+import json
+import os
+import shutil
+import tempfile
+
+class Grading(unittest.TestCase):
+    """
+    Check submissions are graded against expected files, with first mismatch, errors and a JSON results file
+    """
+    
+    print('\nRUNNING grading module')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        names = ['Add', 'Max', 'MaxL', 'Rect', 'RectL', 'Pong', 'PongL']
+        self.pairs = [(os.path.abspath('./data/input/' + name + '.asm'), os.path.abspath('./data/compare/' + name + '.hack')) 
+                      for name in names]
+        
+        #Max.asm with M=D at line 23 changed to M=A, and Add.asm with an unknown comp
+        with open('./data/input/Max.asm') as f:
+            lines = f.read().split('\n')
+        lines[22] = lines[22].replace('M=D', 'M=A')
+        self.wrong = os.path.join(self.folder, 'Wrong.asm')
+        with open(self.wrong, 'w') as f:
+            f.write('\n'.join(lines))
+        self.invalid = os.path.join(self.folder, 'Invalid.asm')
+        with open(self.invalid, 'w') as f:
+            f.write('@2\nD=Q\n')
+            
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_passed(self):
+        for jobs in [1, 2]:
+            results = grading.grade_all(self.pairs, jobs)
+            self.assertEqual([result['passed'] for result in results], [True] * len(self.pairs))
+            self.assertEqual([result['source'] for result in results], [source for source, expected in self.pairs])
+            self.assertEqual(results[0]['words'], 6)
+        
+    def test_mismatch(self):
+        result = grading.grade(self.wrong, os.path.abspath('./data/compare/Max.hack'))
+        self.assertFalse(result['passed'])
+        self.assertIsNone(result['error'])
+        mismatch = result['mismatch']
+        self.assertEqual((mismatch['line'], mismatch['expected_text'][17:], mismatch['actual_text'][17:]), (23, 'M=D', 'M=A'))
+        self.assertEqual(mismatch['rom'], 13)
+        
+        #shorter program misses words at end
+        self.assertEqual(grading.first_mismatch([1, 2], [1, 2, 3]), 
+                         {'rom': 2, 'expected': 3, 'actual': None, 'expected_text': grading.verify.describe(3), 'actual_text': 'missing'})
+        
+    def test_error(self):
+        result = grading.grade(self.invalid, os.path.abspath('./data/compare/Add.hack'))
+        self.assertFalse(result['passed'])
+        self.assertTrue(result['error'].startswith('KeyError'))
+        result = grading.grade(os.path.join(self.folder, 'Missing.asm'), os.path.abspath('./data/compare/Add.hack'))
+        self.assertTrue(result['error'].startswith('FileNotFoundError'))
+        
+    def test_manifest(self):
+        text = os.path.join(self.folder, 'manifest.txt')
+        with open(text, 'w') as f:
+            f.write('# submissions\nWrong.asm ' + os.path.abspath('./data/compare/Max.hack') + '\n\n' + 
+                    'Invalid.asm ' + os.path.abspath('./data/compare/Add.hack') + '\n')
+        pairs = grading.read_manifest(text)
+        self.assertEqual(pairs, [(self.wrong, os.path.abspath('./data/compare/Max.hack')), 
+                                 (self.invalid, os.path.abspath('./data/compare/Add.hack'))])
+        
+        manifest = os.path.join(self.folder, 'manifest.json')
+        with open(manifest, 'w') as f:
+            json.dump([['Wrong.asm', pairs[0][1]], {'source': 'Invalid.asm', 'expected': pairs[1][1]}], f)
+        self.assertEqual(grading.read_manifest(manifest), pairs)
+        
+    def test_results(self):
+        results = grading.grade_all(self.pairs + [(self.wrong, self.pairs[1][1]), (self.invalid, self.pairs[0][1])], jobs=1)
+        fname = os.path.join(self.folder, 'grades.json')
+        grading.write_results(results, fname, 1.5)
+        with open(fname) as f:
+            saved = json.load(f)
+        self.assertEqual(saved['summary'], {'submissions': 9, 'passed': 7, 'failed': 1, 'errors': 1, 'seconds': 1.5})
+        self.assertEqual(saved['results'][7]['mismatch']['line'], 23)
+        self.assertTrue(all(result['seconds'] >= 0 for result in saved['results']))
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for validate-only check mode.
+To run tests in command line, i.e. for test_19 tests: prompt> python -m tests.test_19
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import assembler as cli
+from assembler import check
+import unittest
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+
+class Check(unittest.TestCase):
+    """
+    Check all problems are collected with line numbers, valid programs have none, and no output is written
+    """
+    
+    print('\nRUNNING check module')       
+
+    def test_valid(self):
+        for name in ['Add', 'Max', 'MaxL', 'Rect', 'RectL', 'Pong', 'PongL']:
+            self.assertEqual(check.check_file('./data/input/' + name + '.asm'), [])
+        self.assertEqual(check.check_lines(['  M = D+1   // spaces', 'D;JGT', '@R0', '@32767', '(a.b$c:_1)', '', '// comment']), [])
+            
+    def test_diagnostics(self):
+        lines = ['// header', '@32768', '@1abc', '(LOOP)', '(LOOP)', '(SP)', '(BAD', '(2X)', 
+                 'D=Q', 'X=D', 'D;JXX', 'X=Q;JXX', 'D=M // fine', '@LOOP']
+        self.assertEqual([(number, problem_code) for number, problem_code, message in check.check_lines(lines)], [
+            (2, 'value-range'), (3, 'malformed-symbol'), (5, 'duplicate-label'), (6, 'duplicate-label'), 
+            (7, 'malformed-label'), (8, 'malformed-label'), (9, 'unknown-comp'), (10, 'unknown-dest'), 
+            (11, 'unknown-jump'), (12, 'unknown-dest'), (12, 'unknown-comp'), (12, 'unknown-jump')])
+        self.assertEqual(check.check_lines(['(LOOP)', '(LOOP)'])[0][2], 'duplicate label LOOP, first defined at line 1')
+        self.assertEqual(check.report('a.asm', check.check_lines(['D=Q'])), "a.asm:1: unknown comp 'Q' in D=Q\n")
+        
+    def test_rom_overflow(self):
+        self.assertEqual(check.check_lines(['@1', 'D=A'] * (check.ROM_SIZE // 2)), [])
+        lines = ['@1', 'D=A'] * (check.ROM_SIZE // 2) + ['(END)', '0;JMP']
+        self.assertEqual([diagnostic[:2] for diagnostic in check.check_lines(lines)], [(check.ROM_SIZE + 2, 'rom-overflow')])
+        
+    def test_no_output(self):
+        folder = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(folder, 'Bad.asm'), 'w') as f:
+                f.write('@2\nD=Q\n(X)\n(X)\n')
+            text = io.StringIO()
+            with contextlib.redirect_stdout(text), self.assertRaises(SystemExit):
+                cli.main(['run_all', '--check', '--input-dir', folder, '--output-dir', os.path.join(folder, 'out')])
+            self.assertIn('Bad.asm:2: ', text.getvalue())
+            self.assertIn('Bad.asm:4: ', text.getvalue())
+            self.assertEqual(os.listdir(folder), ['Bad.asm'])
+        finally:
+            shutil.rmtree(folder)
+        
+        
+if __name__ == '__main__':
+    unittest.main()
@@ -11,7 +11,7 @@ from .context import assembler
 from assembler import parser
 from assembler import symbol_table
 import unittest
-import filecmp
+from assembler import verify
 
 class SymbolTable(unittest.TestCase):
     """
@@ -112,9 +112,9 @@ class Compare(unittest.TestCase):
     print('\nCOMPARING OUTPUTS')       
 
     def test_run(self): 
-        self.assertTrue(filecmp.cmp('./data/output/Max.hack', './data/compare/Max.hack'))
-        self.assertTrue(filecmp.cmp('./data/output/Pong.hack', './data/compare/Pong.hack'))
-        self.assertTrue(filecmp.cmp('./data/output/Rect.hack', './data/compare/Rect.hack')) 
+        self.assertEqual(verify.report(verify.compare('./data/compare/Max.hack', './data/output/Max.hack')), '')
+        self.assertEqual(verify.report(verify.compare('./data/compare/Pong.hack', './data/output/Pong.hack')), '')
+        self.assertEqual(verify.report(verify.compare('./data/compare/Rect.hack', './data/output/Rect.hack')), '') 
 
 class PongPrint(unittest.TestCase):
     """
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for single pass translation with label backpatching, memory-mapped bytes tokenizer, 
+compact intermediate representation and NumPy engine.
+To run tests in command line, i.e. for test_3 tests: prompt> python -m tests.test_3
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import parser
+from assembler import tokenizer
+from assembler import ir
+from assembler import code
+from assembler import vectorized
+import unittest
+import filecmp
+from array import array
+
+class SinglePass(unittest.TestCase):
+    """
+    Check single pass outputs match correct versions
+    """
+    
+    print('\nRUNNING single pass through Parser')       
+
+    def test_run(self):
+        for name in ['Add', 'Max', 'MaxL', 'Pong', 'PongL', 'Rect', 'RectL']:
+            parser.Parser('./data/input/' + name + '.asm', auto_run=True, single_pass=True)
+            self.assertTrue(filecmp.cmp('./data/output/' + name + '.hack', './data/compare/' + name + '.hack', shallow=False))
+
+    def test_forward_label(self):
+        p = parser.Parser('./data/input/Max.asm', single_pass=True)
+        p.run_single_pass()
+        self.assertEqual(p._symbols.get_address('OUTPUT_FIRST'), 10)
+        self.assertEqual(p._symbols.get_address('INFINITE_LOOP'), 14)
+
+
+class Mapped(unittest.TestCase):
+    """
+    Check memory-mapped outputs match correct versions
+    """
+    
+    print('\nRUNNING memory-mapped input through Parser')       
+
+    def test_run(self):
+        for name in ['Add', 'Max', 'MaxL', 'Pong', 'PongL', 'Rect', 'RectL']:
+            parser.Parser('./data/input/' + name + '.asm', auto_run=True, mapped=True)
+            self.assertTrue(filecmp.cmp('./data/output/' + name + '.hack', './data/compare/' + name + '.hack', shallow=False))
+            
+    def test_tokenize(self):
+        data = b'// comment\n\n  (LOOP)  \r\n   @i // inline\n D = D+M ;JGT\n@17\n'
+        self.assertEqual(list(tokenizer.tokenize(data)), [(tokenizer.L_COMMAND, b'LOOP'), (tokenizer.A_COMMAND, b'i'), 
+                                                          (tokenizer.C_COMMAND, b'D = D+M ;JGT'), (tokenizer.A_COMMAND, b'17')])
+        self.assertEqual(tokenizer.c_word(b'D = D+M ;JGT'), 0b1111000010010001)
+        self.assertEqual(tokenizer.c_word(b'0;JMP'), 0b1110101010000111)
+
+
+class Program(unittest.TestCase):
+    """
+    Check compact intermediate representation of Max.asm
+    """
+    
+    print('\nRUNNING ir module')       
+
+    def test_run(self):
+        p = parser.Parser('./data/input/Max.asm')
+        program = p.tokenize()
+        self.assertEqual(len(program), 19)
+        self.assertEqual((program.kinds[0], program.names[program.operands[0]], program.lines[0]), (ir.A_SYMBOL, 'R0', 7))
+        self.assertEqual(program.kinds[10], ir.L_COMMAND)
+        self.assertEqual(program.operands[1], program.operands[12])
+        self.assertEqual(len(program.commands), 7)
+
+
+class Vectorized(unittest.TestCase):
+    """
+    Check NumPy engine outputs match correct versions, or fall back to two passes without NumPy
+    """
+    
+    print('\nRUNNING NumPy engine through Parser')       
+
+    def test_run(self):
+        for name in ['Add', 'Max', 'MaxL', 'Pong', 'PongL', 'Rect', 'RectL']:
+            parser.Parser('./data/input/' + name + '.asm', verbose=False).run_vectorized()
+            self.assertTrue(filecmp.cmp('./data/output/' + name + '.hack', './data/compare/' + name + '.hack', shallow=False))
+            
+    @unittest.skipUnless(vectorized.available, 'NumPy is not installed')
+    def test_to_text(self):
+        words = array('H', [0, 1, 0x7FFF, 0x8000, 0xFFFF])
+        self.assertEqual(vectorized.to_text(words), code.to_text(words))
+        self.assertEqual(vectorized.to_text(array('H')), '')
+
+        
+if __name__=='__main__':
+    unittest.main()          
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for output formats: raw binary images and Intel HEX.
+To run tests in command line, i.e. for test_4 tests: prompt> python -m tests.test_4
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import output
+import unittest
+
+class Binary(unittest.TestCase):
+    """
+    Check raw binary images
+    """
+    
+    print('\nRUNNING output module')       
+
+    def test_run(self):
+        words = [0x0002, 0xEC10]
+        self.assertEqual(output.to_binary(words), b'\x00\x02\xEC\x10')
+        self.assertEqual(output.to_binary(words, 'little'), b'\x02\x00\x10\xEC')
+
+class IntelHex(unittest.TestCase):
+    """
+    Check Intel HEX records
+    """
+    
+    def test_run(self):
+        lines = output.to_intel_hex([0x0002, 0xEC10]).splitlines()
+        self.assertEqual(lines, [':040000000002EC10FE', ':00000001FF'])
+        
+    def test_extended_address(self):
+        lines = output.to_intel_hex([0] * 0x8008).splitlines()
+        self.assertEqual(lines[4096], ':020000040001F9')
+        self.assertTrue(lines[4097].startswith(':10000000'))
+        self.assertEqual(lines[-1], ':00000001FF')
+
+        
+if __name__=='__main__':
+    unittest.main()          
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for running all files in a folder across worker processes.
+To run tests in command line, i.e. for test_5 tests: prompt> python -m tests.test_5
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import assembler as cli
+from assembler import parser
+import unittest
+import filecmp
+import os
+import shutil
+import tempfile
+
+class RunAll(unittest.TestCase):
+    """
+    Check run_all with input and output folders and a failing file
+    """
+    
+    print('\nRUNNING run_all across worker processes')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.input_dir = os.path.join(self.folder, 'src')
+        self.output_dir = os.path.join(self.folder, 'build')
+        os.makedirs(os.path.join(self.input_dir, 'sub'))
+        shutil.copy('./data/input/Max.asm', self.input_dir)
+        shutil.copy('./data/input/Rect.asm', os.path.join(self.input_dir, 'sub'))
+        with open(os.path.join(self.input_dir, 'Bad.asm'), 'w') as f:
+            f.write('D=Q\n')
+            
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+       
+    def test_run(self):
+        results = cli.run_all(self.input_dir, self.output_dir, jobs=2)
+        self.assertEqual([os.path.basename(result[0]) for result in results], ['Bad.asm', 'Max.asm', 'Rect.asm'])
+        self.assertIn('KeyError', results[0][2])
+        self.assertIsNone(results[1][2])
+        self.assertTrue(filecmp.cmp(os.path.join(self.output_dir, 'Max.hack'), './data/compare/Max.hack', shallow=False))
+        self.assertTrue(filecmp.cmp(os.path.join(self.output_dir, 'sub', 'Rect.hack'), './data/compare/Rect.hack', shallow=False))
+
+
+class Watch(unittest.TestCase):
+    """
+    Check watch mode finds changed files and keeps going after a failing file
+    """
+    
+    print('\nRUNNING watch mode')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        shutil.copy('./data/input/Max.asm', self.folder)
+        
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+       
+    def test_changed_files(self):
+        mtimes = {}
+        self.assertEqual(cli.changed_files(self.folder, mtimes), [os.path.join(self.folder, 'Max.asm')])
+        self.assertEqual(cli.changed_files(self.folder, mtimes), [])
+        with open(os.path.join(self.folder, 'Bad.asm'), 'w') as f:
+            f.write('D=Q\n')
+        self.assertEqual(cli.changed_files(self.folder, mtimes), [os.path.join(self.folder, 'Bad.asm')])
+        
+    def test_run(self):
+        with open(os.path.join(self.folder, 'Bad.asm'), 'w') as f:
+            f.write('D=Q\n')
+        output_dir = os.path.join(self.folder, 'build')
+        cli.watch(self.folder, output_dir, interval=0, polls=2)
+        self.assertTrue(filecmp.cmp(os.path.join(output_dir, 'Max.hack'), './data/compare/Max.hack', shallow=False))
+
+class Chunked(unittest.TestCase):
+    """
+    Check one file translated in chunks across worker processes matches correct versions
+    """
+    
+    print('\nRUNNING chunks across worker processes')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+       
+    def test_run(self):
+        for name, chunk_lines in [('Rect', 5), ('Max', 7), ('Pong', 2000)]:
+            p = parser.Parser('./data/input/' + name + '.asm', output_dir=self.folder, verbose=False)
+            p.run_parallel(jobs=2, chunk_lines=chunk_lines)
+            self.assertTrue(filecmp.cmp(os.path.join(self.folder, name + '.hack'), './data/compare/' + name + '.hack', shallow=False))
+        self.assertEqual(p._symbols.get_address('ball.bounce$if_end1'), 2086)
+
+        
+if __name__=='__main__':
+    unittest.main()          
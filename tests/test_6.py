@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for build cache of translated files.
+To run tests in command line, i.e. for test_6 tests: prompt> python -m tests.test_6
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import build_cache
+import unittest
+import filecmp
+import os
+import shutil
+import tempfile
+
+class BuildCache(unittest.TestCase):
+    """
+    Check BuildCache hits, misses and eviction
+    """
+    
+    print('\nRUNNING BuildCache')       
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.cache = build_cache.BuildCache(os.path.join(self.folder, 'cache'))
+        self.output = os.path.join(self.folder, 'Max.hack')
+        
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+       
+    def test_run(self):
+        options = {'output_dir': self.folder, 'verbose': False}
+        self.assertFalse(build_cache.assemble(self.cache, './data/input/Max.asm', **options))
+        os.remove(self.output)
+        self.assertTrue(build_cache.assemble(self.cache, './data/input/Max.asm', **options))
+        self.assertTrue(filecmp.cmp(self.output, './data/compare/Max.hack', shallow=False))
+        self.assertFalse(build_cache.assemble(self.cache, './data/input/Max.asm', formats=['hack', 'bin'], **options))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+        
+    def test_evict(self):
+        build_cache.assemble(self.cache, './data/input/Max.asm', output_dir=self.folder, verbose=False)
+        self.assertEqual(self.cache.evict(), 0)
+        self.cache.max_bytes = 0
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertIn('0 files', self.cache.stats())
+
+        
+if __name__=='__main__':
+    unittest.main()          
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for benchmark program generators.
+To run tests in command line, i.e. for test_7 tests: prompt> python -m tests.test_7
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import check
+from assembler import parser
+from benchmarks import generate
+import unittest
+
+class Generate(unittest.TestCase):
+    """
+    Check generated programs are reproducible and translate
+    """
+    
+    print('\nRUNNING benchmark generators through Parser')       
+
+    def test_run(self):
+        for kind in generate.kinds:
+            program = generate.generate(kind, lines=2000, seed=1)
+            self.assertEqual(program, generate.generate(kind, lines=2000, seed=1))
+            p = parser.Parser('<' + kind + '>', content=program, verbose=False)
+            p.run_first_pass()
+            self.assertGreater(len(p.encode_commands()), 500)
+            
+    def test_labels(self):
+        for kind in generate.kinds:
+            program = generate.generate(kind, lines=2000, seed=1)
+            self.assertEqual(check.check_lines(program), [])
+
+        
+if __name__=='__main__':
+    unittest.main()          
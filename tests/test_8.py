@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for phase timings and counters.
+To run tests in command line, i.e. for test_8 tests: prompt> python -m tests.test_8
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import parser
+from assembler import stats
+import unittest
+import shutil
+import tempfile
+
+class Stats(unittest.TestCase):
+    """
+    Check Stats phases, enabled and disabled
+    """
+    
+    print('\nRUNNING Stats')       
+
+    def test_run(self):
+        timer = stats.Stats()
+        with timer.phase('read'):
+            pass
+        with timer.phase('read'):
+            pass
+        self.assertEqual(list(timer.phases), ['read'])
+        
+        timer = stats.Stats(enabled=False)
+        with timer.phase('read'):
+            pass
+        self.assertEqual(timer.phases, {})
+
+class Statistics(unittest.TestCase):
+    """
+    Check Parser statistics for Rect.asm, read as lines and memory-mapped
+    """
+    
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+       
+    def test_run(self):
+        for mapped in [False, True]:
+            p = parser.Parser('./data/input/Rect.asm', output_dir=self.folder, verbose=False, mapped=mapped, stats=True)
+            p.run()
+            statistics = p.statistics()
+            self.assertIn('write', statistics['phases'])
+            counts = statistics['counts']
+            self.assertEqual((counts['lines'], counts['labels'], counts['variables']), (35, 2, 2))
+            self.assertEqual((counts['a_commands'], counts['c_commands']), (12, 13))
+
+        
+if __name__=='__main__':
+    unittest.main()          
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*- 
+
+"""
+Assember tests for library API, translating in memory.
+To run tests in command line, i.e. for test_9 tests: prompt> python -m tests.test_9
+To run all tests in the tests package: prompt> python -m unittest
+"""
+
+from .context import assembler 
+from assembler import output
+import unittest
+import io
+
+class Assemble(unittest.TestCase):
+    """
+    Check assemble() with text, bytes and lines as source, and with sinks
+    """
+    
+    print('\nRUNNING api module')       
+
+    def setUp(self):
+        with open('./data/input/Rect.asm') as f:
+            self.source = f.read()
+        with open('./data/compare/Rect.hack') as f:
+            self.compare = f.read()
+       
+    def test_run(self):
+        text = io.StringIO()
+        binary = io.BytesIO()
+        words = assembler.assemble(self.source, sinks=[output.Sink(text), output.Sink(binary, 'bin')])
+        self.assertEqual(text.getvalue(), self.compare)
+        self.assertEqual(binary.getvalue(), output.to_binary(words))
+        self.assertEqual(assembler.assemble(self.source.encode()), words)
+        self.assertEqual(assembler.assemble(io.StringIO(self.source)), words)
+        
+    def test_iter_words(self):
+        words = list(assembler.iter_words(['@2', 'D=A', '(END)', '@END', '0;JMP']))
+        self.assertEqual(words, [(0, 2), (1, 0b1110110000010000), (2, 2), (3, 0b1110101010000111)])
+
+        
+if __name__=='__main__':
+    unittest.main()          